@@ -1782,14 +1782,14 @@ def render_admin_tab(conn):
 
             st.info(f"Aktueller Status: **{STATUS_LABELS.get(current_status, current_status)}**")
 
-            valid_next = VALID_TRANSITIONS.get(current_status, [])
+            valid_next = VALID_TRANSITIONS.get(current_status, frozenset())
             force = st.checkbox("Erzwingen (ungueltige Transition)", key="force_single")
 
             if force:
                 st.warning("Alle Status-Optionen verfuegbar. Transition-Regeln werden ignoriert.")
                 status_options = [s for s in ALL_STATUSES if s != current_status]
             else:
-                status_options = list(valid_next)
+                status_options = [s for s in ALL_STATUSES if s in valid_next]
 
             if not status_options:
                 st.info("Keine erlaubten Uebergaenge fuer diesen Status." + (" Aktivieren Sie 'Erzwingen' fuer Admin-Override." if not force else ""))
@@ -1824,8 +1824,8 @@ def render_admin_tab(conn):
                     format_func=lambda x: x[1], key="status_bulk_select")
 
                 force = st.checkbox("Erzwingen", key="force_bulk")
-                valid_next = VALID_TRANSITIONS.get(filter_status, [])
-                target_options = [s for s in ALL_STATUSES if s != filter_status] if force else list(valid_next)
+                valid_next = VALID_TRANSITIONS.get(filter_status, frozenset())
+                target_options = [s for s in ALL_STATUSES if s != filter_status] if force else [s for s in ALL_STATUSES if s in valid_next]
 
                 if not target_options:
                     st.info("Keine erlaubten Uebergaenge." + (" Aktivieren Sie 'Erzwingen'." if not force else ""))
@@ -6,14 +6,13 @@ und Abweichungs-Balkendiagrammen.
 """
 
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 
 from cashflow_queries import get_actual_vs_forecast_cached
 from cashflow_portfolio_charts import (
     create_actual_vs_forecast_chart,
-    create_deviation_chart,
+    create_deviation_altair_chart,
 )
+from cashflow_ui_helpers import chart_png
 
 
 def render_actual_vs_forecast_section(conn_id, fund_id, fund_name, currency, scenario_name):
@@ -39,23 +38,21 @@ def render_actual_vs_forecast_section(conn_id, fund_id, fund_name, currency, sce
             st.metric("Ø Abweichung", f"{metrics['mean_deviation']:,.0f} {currency}")
 
         # Overlay-Chart
-        fig = create_actual_vs_forecast_chart(
-            avf['actual_cumulative'], avf['forecast_cumulative'],
+        png = chart_png(
+            create_actual_vs_forecast_chart, avf['actual_cumulative'], avf['forecast_cumulative'],
             f'Ist vs. Forecast: {fund_name}', currency
         )
-        if fig:
-            st.pyplot(fig)
-            plt.close(fig)
+        if png:
+            st.image(png, width='stretch')
 
         # Abweichungs-Balkendiagramm
         if not avf['periodic_deviation'].empty:
-            fig = create_deviation_chart(
+            chart = create_deviation_altair_chart(
                 avf['periodic_deviation'],
                 f'Abweichung pro Quartal: {fund_name}', currency
             )
-            if fig:
-                st.pyplot(fig)
-                plt.close(fig)
+            if chart is not None:
+                st.altair_chart(chart)
 
             # Detail-Tabelle
             st.markdown("**Abweichungs-Detail**")
@@ -4,6 +4,8 @@ Cashflow Planning Tool — Alerts & Deadlines
 Alert-Banner für anstehende Capital Calls und Commitment-Deadlines.
 """
 
+from datetime import date
+
 import streamlit as st
 
 from cashflow_queries import (
@@ -15,8 +17,9 @@ from cashflow_queries import (
 def render_alerts_banner(conn_id):
     """Rendert Alert-Banner für anstehende Calls und Deadlines."""
 
-    upcoming_calls = get_upcoming_capital_calls_cached(conn_id, days_ahead=90)
-    deadline_warnings = get_commitment_deadline_warnings_cached(conn_id, days_ahead=90)
+    today = date.today()
+    upcoming_calls = get_upcoming_capital_calls_cached(conn_id, today, days_ahead=90)
+    deadline_warnings = get_commitment_deadline_warnings_cached(conn_id, today, days_ahead=90)
 
     alerts = []
 
@@ -5,9 +5,12 @@ Vier Charts:
   1. J-Curve (kumulierter Netto-Cashflow)
   2. Cashflow-Balkendiagramm (Kapitalabrufe vs. Ausschüttungen pro Periode)
   3. Net Cashflow Timeline (Flächendiagramm kumulativ)
-  4. Forecast Preview (Mini-Balkendiagramm für Vorschau)
+  4. Forecast Preview (Mini-Balkendiagramm für Vorschau aus Jahres-DataFrame)
+
+Dazu df_hash / fig_to_png_bytes für gecachte PNG-Charts (UI und PDF-Export).
 """
 
+import io
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import numpy as np
@@ -137,8 +140,9 @@ def create_net_cashflow_timeline(cumulative_df, fund_name,
     dates = cumulative_df['date']
 
     # Kumulative Werte berechnen
-    cum_calls = cumulative_df['capital_calls'].cumsum().abs()
-    cum_dists = cumulative_df['distributions'].cumsum()
+    # Laufsummen kommen vorberechnet aus get_cumulative_cashflows_cached
+    cum_calls = -cumulative_df['cum_calls']
+    cum_dists = cumulative_df['cum_dists']
 
     ax.fill_between(dates, cum_calls, alpha=0.4, color='#ef5350',
                     label='Kumulative Kapitalabrufe')
@@ -166,53 +170,35 @@ def create_net_cashflow_timeline(cumulative_df, fund_name,
     return fig
 
 
-def create_forecast_preview_chart(forecast, currency='EUR'):
-    """Mini-Balkendiagramm für Forecast-Vorschau (aggregiert nach Jahr).
+def create_forecast_preview_chart_from_df(yearly_df, currency='EUR'):
+    """Mini-Balkendiagramm für Forecast-Vorschau aus bereits aggregierten Jahreswerten.
 
     Args:
-        forecast: list[dict] mit {date, type, amount}
+        yearly_df: DataFrame mit Jahr, Calls, Distributions, Netto (sortiert nach Jahr)
         currency: Währung für Achsenbeschriftung
 
     Returns:
         matplotlib Figure oder None
     """
-    if not forecast:
-        return None
-
-    # Aggregiere nach Jahr
-    calls_by_year = {}
-    dists_by_year = {}
-    outflow_types = {'capital_call', 'management_fee', 'carried_interest'}
-
-    for entry in forecast:
-        year = entry['date'].year if hasattr(entry['date'], 'year') else entry['date']
-        amt = entry['amount']
-        if entry['type'] in outflow_types:
-            calls_by_year[year] = calls_by_year.get(year, 0) + amt
-        else:
-            dists_by_year[year] = dists_by_year.get(year, 0) + amt
-
-    all_years = sorted(set(list(calls_by_year.keys()) + list(dists_by_year.keys())))
-    if not all_years:
+    if yearly_df is None or yearly_df.empty:
         return None
 
-    calls = [calls_by_year.get(y, 0) for y in all_years]
-    dists = [dists_by_year.get(y, 0) for y in all_years]
-    labels = [str(y) for y in all_years]
+    calls = yearly_df['Calls'].to_numpy()
+    dists = yearly_df['Distributions'].to_numpy()
+    labels = yearly_df['Jahr'].astype(str)
 
     fig, ax = plt.subplots(figsize=(10, 4))
-    x = np.arange(len(all_years))
+    x = np.arange(len(yearly_df))
     width = 0.35
 
-    ax.bar(x - width / 2, [-c for c in calls], width, label='Kapitalabrufe',
+    ax.bar(x - width / 2, -calls, width, label='Kapitalabrufe',
            color='#ef5350', alpha=0.85)
     ax.bar(x + width / 2, dists, width, label='Ausschüttungen',
            color='#66bb6a', alpha=0.85)
 
     # Netto-Linie
-    net = [d - c for c, d in zip(calls, dists)]
-    ax.plot(x, net, color='black', linewidth=1.5, marker='o', markersize=4,
-            label='Netto', zorder=3)
+    ax.plot(x, yearly_df['Netto'].to_numpy(), color='black', linewidth=1.5,
+            marker='o', markersize=4, label='Netto', zorder=3)
 
     ax.axhline(y=0, color='gray', linestyle='-', linewidth=0.5)
     ax.set_title('Forecast-Vorschau', fontsize=12, fontweight='bold')
@@ -224,3 +210,16 @@ def create_forecast_preview_chart(forecast, currency='EUR'):
     plt.tight_layout()
 
     return fig
+
+
+def df_hash(df):
+    """Inhalts-Hash eines DataFrames als Cache-Key für die gecachten UI-Charts."""
+    return pd.util.hash_pandas_object(df, index=True).values.tobytes()
+
+
+def fig_to_png_bytes(fig, dpi=200):
+    """PNG-bytes einer matplotlib Figure (UI per st.image, PDF-Export); schließt die Figure."""
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    return buf.getvalue()
@@ -6,11 +6,12 @@ Rendert Portfolio-KPIs am Anfang des Cashflow-Tabs.
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import date
 
 from cashflow_queries import (
     get_all_funds_for_cashflow_cached,
-    get_cashflow_summary_cached,
+    get_cashflow_summaries_batch_cached,
     get_upcoming_capital_calls_cached,
 )
 
@@ -33,48 +34,36 @@ def render_dashboard_widgets(conn_id, base_currency='EUR'):
     )
     use_mixed = (dash_ccy == 'Gemischt')
 
-    # Metriken sammeln
-    total_commitment = 0.0
-    total_unfunded = 0.0
-    total_called = 0.0
-    total_distributed = 0.0
-    active_funds = 0
-    dpi_values = []
-
     if use_mixed:
-        # Gemischt: keine FX-Konversion, einfach summieren
-        for _, row in all_funds_df.iterrows():
-            fid = int(row['fund_id'])
-            commit = row.get('commitment_amount') or 0
-            unfunded = row.get('unfunded_amount') or 0
-            total_commitment += commit
-            total_unfunded += unfunded
-
-            summary = get_cashflow_summary_cached(conn_id, fid, 'base')
-            called = summary.get('total_called', 0)
-            distributed = summary.get('total_distributed', 0)
-            total_called += called
-            total_distributed += distributed
-
-            if called > 0 or distributed > 0:
-                active_funds += 1
-                dpi_values.append(summary.get('dpi', 0))
+        # Gemischt: keine FX-Konversion, einfach summieren (ein SQL-Aggregat je Fonds)
+        per_fund = get_cashflow_summaries_batch_cached(conn_id, fund_ids, 'base')
+        called = per_fund['total_called'].to_numpy(dtype=np.float64)
+        distributed = per_fund['total_distributed'].to_numpy(dtype=np.float64)
+        total_commitment = float(per_fund['commitment_amount'].to_numpy(dtype=np.float64).sum())
+        total_unfunded = float(per_fund['unfunded_amount'].to_numpy(dtype=np.float64).sum())
+        total_called = float(called.sum())
+        total_distributed = float(distributed.sum())
+
+        active = (called > 0) | (distributed > 0)
+        active_funds = int(active.sum())
+        dpi = np.divide(distributed, called, out=np.zeros_like(called), where=called > 0)
+        dpi_values = dpi[active].tolist()
     else:
         # Mit FX-Konversion über Portfolio-Summary
         from cashflow_queries import get_portfolio_summary_cached
         summary = get_portfolio_summary_cached(conn_id, fund_ids, dash_ccy, 'base')
-        total_commitment = summary['total_commitment']
-        total_unfunded = summary['total_unfunded']
-        total_called = summary['total_called']
-        total_distributed = summary['total_distributed']
-        active_funds = summary['num_funds']
-        dpi_values = [summary['portfolio_dpi']]
+        total_commitment = summary.total_commitment
+        total_unfunded = summary.total_unfunded
+        total_called = summary.total_called
+        total_distributed = summary.total_distributed
+        active_funds = summary.num_funds
+        dpi_values = [summary.portfolio_dpi]
 
     avg_dpi = sum(dpi_values) / len(dpi_values) if dpi_values else 0.0
     ccy_label = 'Mix' if use_mixed else dash_ccy
 
     # Nächster Call
-    upcoming = get_upcoming_capital_calls_cached(conn_id, days_ahead=90)
+    upcoming = get_upcoming_capital_calls_cached(conn_id, date.today(), days_ahead=90)
     next_call_str = "–"
     if not upcoming.empty:
         first = upcoming.iloc[0]
@@ -117,9 +106,8 @@ def render_dashboard_widgets(conn_id, base_currency='EUR'):
                 st.metric("Prob.-Gew. Commitment",
                            f"{pipe_summary['probability_weighted_commitment']:,.0f}")
             with r3c3:
-                upcoming = pipe_summary['upcoming_next_steps']
-                if upcoming:
-                    ns = upcoming[0]
+                ns = pipe_summary['next_deadline']
+                if ns:
                     st.metric("Nächste DD-Deadline",
                               f"{ns['next_step_date']}")
                 else:
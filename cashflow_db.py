@@ -7,6 +7,9 @@ Vorzeichen-Konvention:
     - Inflows (positiv in Charts): distribution, clawback
 """
 
+from psycopg2.extras import execute_batch
+
+
 # ============================================================================
 # SCHEMA — Tabellen und Spalten erstellen
 # ============================================================================
@@ -220,6 +223,101 @@ def get_cashflows_for_fund(conn, fund_id, scenario_name=None):
         return [dict(zip(columns, row)) for row in cursor.fetchall()]
 
 
+def get_cashflows_for_funds(conn, fund_ids, scenario_name=None):
+    """Wie get_cashflows_for_fund, aber für mehrere Fonds in einem Query.
+    Sortiert nach fund_id, date."""
+    with conn.cursor() as cursor:
+        if scenario_name:
+            cursor.execute("""
+            SELECT cashflow_id, fund_id, date, type, amount, currency,
+                   is_actual, scenario_name, notes, created_at
+            FROM cashflows
+            WHERE fund_id = ANY(%s) AND scenario_name = %s
+            ORDER BY fund_id, date
+            """, (list(fund_ids), scenario_name))
+        else:
+            cursor.execute("""
+            SELECT cashflow_id, fund_id, date, type, amount, currency,
+                   is_actual, scenario_name, notes, created_at
+            FROM cashflows
+            WHERE fund_id = ANY(%s)
+            ORDER BY fund_id, date
+            """, (list(fund_ids),))
+        columns = [desc[0] for desc in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def get_daily_cashflow_aggregates(conn, fund_ids, outflow_types, scenario_name=None,
+                                  planned_only=False):
+    """Summiert Cashflows mehrerer Fonds pro (Datum, Fondswährung) in der DB.
+    planned_only=True → nur geplante Cashflows (is_actual = FALSE).
+
+    Returns: list[dict] mit date, currency, calls (Summe der outflow_types, positiv),
+             dists (Summe aller übrigen Typen), sortiert nach date.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("""
+        SELECT c.date, COALESCE(f.currency, 'EUR') AS currency,
+               COALESCE(SUM(c.amount) FILTER (WHERE c.type = ANY(%s)), 0) AS calls,
+               COALESCE(SUM(c.amount) FILTER (WHERE c.type <> ALL(%s)), 0) AS dists
+        FROM cashflows c
+        JOIN funds f ON f.fund_id = c.fund_id
+        WHERE c.fund_id = ANY(%s)
+          AND (%s IS NULL OR c.scenario_name = %s)
+          AND (NOT %s OR c.is_actual = FALSE)
+        GROUP BY c.date, COALESCE(f.currency, 'EUR')
+        ORDER BY c.date
+        """, (list(outflow_types), list(outflow_types), list(fund_ids),
+              scenario_name, scenario_name, planned_only))
+        columns = [desc[0] for desc in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def get_fund_daily_cashflow_aggregates(conn, fund_id, outflow_types, scenario_name=None):
+    """Summiert die Cashflows eines Fonds pro Datum in der DB.
+
+    Returns: list[dict] mit date, calls (Summe der outflow_types, positiv),
+             dists (Summe aller übrigen Typen), is_actual (alle Zeilen des Tages Ist),
+             sortiert nach date.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("""
+        SELECT date,
+               COALESCE(SUM(amount) FILTER (WHERE type = ANY(%s)), 0) AS calls,
+               COALESCE(SUM(amount) FILTER (WHERE type <> ALL(%s)), 0) AS dists,
+               BOOL_AND(COALESCE(is_actual, TRUE)) AS is_actual
+        FROM cashflows
+        WHERE fund_id = %s
+          AND (%s IS NULL OR scenario_name = %s)
+        GROUP BY date
+        ORDER BY date
+        """, (list(outflow_types), list(outflow_types), fund_id,
+              scenario_name, scenario_name))
+        columns = [desc[0] for desc in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def get_fund_daily_cashflow_aggregates_by_scenario(conn, fund_id, outflow_types, scenario_names):
+    """Wie get_fund_daily_cashflow_aggregates, aber für mehrere Szenarien in einem Query.
+
+    Returns: list[dict] mit scenario_name, date, calls, dists, is_actual,
+             sortiert nach scenario_name, date.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("""
+        SELECT scenario_name, date,
+               COALESCE(SUM(amount) FILTER (WHERE type = ANY(%s)), 0) AS calls,
+               COALESCE(SUM(amount) FILTER (WHERE type <> ALL(%s)), 0) AS dists,
+               BOOL_AND(COALESCE(is_actual, TRUE)) AS is_actual
+        FROM cashflows
+        WHERE fund_id = %s AND scenario_name = ANY(%s)
+        GROUP BY scenario_name, date
+        ORDER BY scenario_name, date
+        """, (list(outflow_types), list(outflow_types), fund_id, list(scenario_names)))
+        columns = [desc[0] for desc in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
 def bulk_insert_cashflows(conn, cashflows_list):
     """Bulk-Insert von Cashflows (für Excel-Import).
 
@@ -229,21 +327,20 @@ def bulk_insert_cashflows(conn, cashflows_list):
     if not cashflows_list:
         return 0
     with conn.cursor() as cursor:
-        count = 0
-        for cf in cashflows_list:
-            cursor.execute("""
-            INSERT INTO cashflows (fund_id, date, type, amount, currency, is_actual, scenario_name, notes)
-            VALUES (%(fund_id)s, %(date)s, %(type)s, %(amount)s, %(currency)s,
-                    %(is_actual)s, %(scenario_name)s, %(notes)s)
-            ON CONFLICT (fund_id, date, type, scenario_name)
-            DO UPDATE SET amount = EXCLUDED.amount,
-                          currency = EXCLUDED.currency,
-                          is_actual = EXCLUDED.is_actual,
-                          notes = EXCLUDED.notes
-            """, cf)
-            count += 1
+        # execute_batch statt execute_values: Duplikate innerhalb eines Imports
+        # würden sonst im selben Statement zweimal ON CONFLICT treffen
+        execute_batch(cursor, """
+        INSERT INTO cashflows (fund_id, date, type, amount, currency, is_actual, scenario_name, notes)
+        VALUES (%(fund_id)s, %(date)s, %(type)s, %(amount)s, %(currency)s,
+                %(is_actual)s, %(scenario_name)s, %(notes)s)
+        ON CONFLICT (fund_id, date, type, scenario_name)
+        DO UPDATE SET amount = EXCLUDED.amount,
+                      currency = EXCLUDED.currency,
+                      is_actual = EXCLUDED.is_actual,
+                      notes = EXCLUDED.notes
+        """, cashflows_list, page_size=500)
         conn.commit()
-        return count
+        return len(cashflows_list)
 
 
 # ============================================================================
@@ -368,3 +465,37 @@ def get_exchange_rate_with_inverse(conn, from_currency, to_currency, rate_date):
     if inverse_rate is not None and inverse_rate != 0:
         return 1.0 / inverse_rate
     return None
+
+
+def get_fx_rate_series(conn, from_currencies, to_currency, start_date, end_date):
+    """Alle Kurse currency→to_currency und to_currency→currency für jede Währung
+    in from_currencies, die für Daten in [start_date, end_date] relevant sind
+    (inkl. jeweils letztem Kurs vor start_date) — ein Query statt einer Abfrage
+    pro Cashflow und Währung.
+
+    Returns: list[dict] mit currency, rate_date, rate, direct
+             (False = to_currency→currency, invertieren), sortiert nach rate_date.
+    """
+    currencies = list(from_currencies)
+    with conn.cursor() as cursor:
+        cursor.execute("""
+        WITH pair AS (
+            SELECT CASE WHEN to_currency = %s THEN from_currency ELSE to_currency END AS currency,
+                   rate_date, rate, (to_currency = %s) AS direct
+            FROM exchange_rates
+            WHERE ((from_currency = ANY(%s) AND to_currency = %s)
+                OR (from_currency = %s AND to_currency = ANY(%s)))
+              AND rate_date <= %s
+        )
+        SELECT currency, rate_date, rate, direct
+        FROM pair p
+        WHERE rate_date >= COALESCE(
+            (SELECT MAX(rate_date) FROM pair q
+             WHERE q.currency = p.currency AND q.direct = p.direct
+               AND q.rate_date <= %s),
+            %s)
+        ORDER BY rate_date
+        """, (to_currency, to_currency, currencies, to_currency, to_currency, currencies,
+              end_date, start_date, start_date))
+        columns = [desc[0] for desc in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
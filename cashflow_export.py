@@ -9,9 +9,10 @@ import io
 import pandas as pd
 import matplotlib
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
 from datetime import date
 
+from cashflow_charts import fig_to_png_bytes
+
 
 # ============================================================================
 # EXCEL EXPORTS
@@ -96,13 +97,13 @@ def export_portfolio_excel(fund_breakdown_df, summary, periodic_df, base_currenc
                       'Total Unfunded', 'Netto-Cashflow', 'Portfolio DPI',
                       'Anzahl Fonds', 'Basiswährung', 'Export-Datum'],
             'Wert': [
-                f"{summary.get('total_commitment', 0):,.0f}",
-                f"{summary.get('total_called', 0):,.0f}",
-                f"{summary.get('total_distributed', 0):,.0f}",
-                f"{summary.get('total_unfunded', 0):,.0f}",
-                f"{summary.get('net_cashflow', 0):,.0f}",
-                f"{summary.get('portfolio_dpi', 0):.2f}x",
-                str(summary.get('num_funds', 0)),
+                f"{summary.total_commitment:,.0f}",
+                f"{summary.total_called:,.0f}",
+                f"{summary.total_distributed:,.0f}",
+                f"{summary.total_unfunded:,.0f}",
+                f"{summary.net_cashflow:,.0f}",
+                f"{summary.portfolio_dpi:.2f}x",
+                str(summary.num_funds),
                 base_currency,
                 str(date.today()),
             ],
@@ -168,13 +169,9 @@ def export_liquidity_excel(funding_gap_df, cash_reserve_df, params, base_currenc
 # PDF EXPORTS
 # ============================================================================
 
-def _fig_to_image_bytes(fig):
-    """Konvertiert matplotlib Figure zu PNG bytes."""
-    buf = io.BytesIO()
-    fig.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-    plt.close(fig)
-    buf.seek(0)
-    return buf
+def _fig_to_image_bytes(fig, dpi=150):
+    """Konvertiert matplotlib Figure zu PNG bytes (BytesIO) und schließt sie."""
+    return io.BytesIO(fig_to_png_bytes(fig, dpi=dpi))
 
 
 def export_fund_report_pdf(fund_name, currency, summary, cumulative_df, periodic_df, commit_info):
@@ -217,10 +214,10 @@ def export_fund_report_pdf(fund_name, currency, summary, cumulative_df, periodic
     commitment = commit_info.get('commitment_amount') or 0
     kpi_data = [
         ['Commitment', f"{commitment:,.0f} {currency}",
-         'Total Abrufe', f"{summary.get('total_called', 0):,.0f} {currency}"],
-        ['Total Ausschüttungen', f"{summary.get('total_distributed', 0):,.0f} {currency}",
-         'Netto-Cashflow', f"{summary.get('net_cashflow', 0):,.0f} {currency}"],
-        ['DPI', f"{summary.get('dpi', 0):.2f}x",
+         'Total Abrufe', f"{summary.total_called:,.0f} {currency}"],
+        ['Total Ausschüttungen', f"{summary.total_distributed:,.0f} {currency}",
+         'Netto-Cashflow', f"{summary.net_cashflow:,.0f} {currency}"],
+        ['DPI', f"{summary.dpi:.2f}x",
          'Unfunded', f"{commit_info.get('unfunded_amount', 0) or 0:,.0f} {currency}"],
     ]
     kpi_table = Table(kpi_data, colWidths=[4*cm, 4.5*cm, 4*cm, 4.5*cm])
@@ -326,19 +323,19 @@ def export_portfolio_report_pdf(summary, fund_breakdown_df, cumulative_df,
     elements.append(Paragraph(f"Portfolio Report", title_style))
     elements.append(Paragraph(
         f"Datum: {date.today().strftime('%d.%m.%Y')} | Basiswährung: {base_currency} | "
-        f"Fonds: {summary.get('num_funds', 0)}",
+        f"Fonds: {summary.num_funds}",
         styles['Normal']
     ))
     elements.append(Spacer(1, 0.5*cm))
 
     # KPIs
     kpi_data = [
-        ['Total Commitment', f"{summary.get('total_commitment', 0):,.0f} {base_currency}",
-         'Total Called', f"{summary.get('total_called', 0):,.0f} {base_currency}"],
-        ['Total Distributed', f"{summary.get('total_distributed', 0):,.0f} {base_currency}",
-         'Netto-Cashflow', f"{summary.get('net_cashflow', 0):,.0f} {base_currency}"],
-        ['Portfolio DPI', f"{summary.get('portfolio_dpi', 0):.2f}x",
-         'Total Unfunded', f"{summary.get('total_unfunded', 0):,.0f} {base_currency}"],
+        ['Total Commitment', f"{summary.total_commitment:,.0f} {base_currency}",
+         'Total Called', f"{summary.total_called:,.0f} {base_currency}"],
+        ['Total Distributed', f"{summary.total_distributed:,.0f} {base_currency}",
+         'Netto-Cashflow', f"{summary.net_cashflow:,.0f} {base_currency}"],
+        ['Portfolio DPI', f"{summary.portfolio_dpi:.2f}x",
+         'Total Unfunded', f"{summary.total_unfunded:,.0f} {base_currency}"],
     ]
     kpi_table = Table(kpi_data, colWidths=[4*cm, 4.5*cm, 4*cm, 4.5*cm])
     kpi_table.setStyle(TableStyle([
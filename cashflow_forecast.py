@@ -14,6 +14,10 @@ import math
 # HELPERS
 # ============================================================================
 
+# (Monat, Tag) des Quartalsendes für Q1..Q4
+_QUARTER_END_MONTH_DAY = ((3, 31), (6, 30), (9, 30), (12, 31))
+
+
 def _quarter_end_dates(start_year, num_quarters):
     """Gibt eine Liste von Quartalsenddaten zurück.
 
@@ -24,19 +28,10 @@ def _quarter_end_dates(start_year, num_quarters):
     Returns:
         list[date] — z.B. [2024-03-31, 2024-06-30, 2024-09-30, 2024-12-31, ...]
     """
-    quarter_ends = []
-    for i in range(num_quarters):
-        year = start_year + (i // 4)
-        q = (i % 4) + 1
-        if q == 1:
-            quarter_ends.append(date(year, 3, 31))
-        elif q == 2:
-            quarter_ends.append(date(year, 6, 30))
-        elif q == 3:
-            quarter_ends.append(date(year, 9, 30))
-        else:
-            quarter_ends.append(date(year, 12, 31))
-    return quarter_ends
+    return [
+        date(start_year + (i // 4), *_QUARTER_END_MONTH_DAY[i % 4])
+        for i in range(num_quarters)
+    ]
 
 
 def _annual_to_quarterly(annual_amounts):
@@ -119,17 +114,20 @@ def forecast_takahashi_alexander(commitment, lifetime=10, vintage_year=2024,
     rd_q = rd / 4.0
     g_q = (1 + growth_rate) ** 0.25 - 1
 
+    # Bow-Faktor: parabolisch, Peak in der Mitte (schleifeninvariant vorberechnet)
+    mid_sq = (L / 2.0) ** 2
+    bow_curve = []
+    for i in range(num_quarters):
+        t = (i + 1) / 4.0  # Jahr-Offset
+        bow_raw = (t * (L - t)) / mid_sq
+        bow_curve.append(bow_raw ** bow_factor if bow_raw > 0 else 0.0)
+
     results = []
     nav = 0.0
     total_called = 0.0
 
     for i in range(num_quarters):
-        t = (i + 1) / 4.0  # Jahr-Offset
-
-        # Bow-Faktor: parabolisch, Peak in der Mitte
-        mid = L / 2.0
-        bow_raw = (t * (L - t)) / (mid ** 2)
-        bow = bow_raw ** bow_factor if bow_raw > 0 else 0.0
+        bow = bow_curve[i]
 
         unfunded = commitment - total_called
         call = rc_q * bow * unfunded
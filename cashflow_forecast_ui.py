@@ -7,6 +7,7 @@ Streamlit-UI für Modell-Auswahl, Parameter, Vorschau und Speichern.
 import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
+from collections import defaultdict
 from datetime import date
 
 from database import clear_cache
@@ -16,9 +17,10 @@ from cashflow_db import (
 from cashflow_queries import (
     get_scenarios_cached, get_cashflows_for_fund_cached,
     get_fund_commitment_info_cached, get_historical_pacing_cached,
-    get_all_funds_for_cashflow_cached, OUTFLOW_TYPES
+    get_all_funds_for_cashflow_cached, get_fund_name_to_id_cached, OUTFLOW_TYPES
 )
-from cashflow_charts import create_forecast_preview_chart
+from cashflow_charts import create_forecast_preview_chart_from_df
+from cashflow_ui_helpers import amount_column_config
 from cashflow_forecast import (
     forecast_takahashi_alexander,
     forecast_driessen_lin_phalippou,
@@ -62,6 +64,15 @@ MODEL_OPTIONS = {
     },
 }
 
+# Session-State-Keys der Forecast-Vorschau (werden gemeinsam gesetzt/gelöscht)
+_FC_PREVIEW_KEYS = ('fc_preview', 'fc_model_name', 'fc_preview_df', 'fc_preview_metrics')
+
+
+def _clear_forecast_preview_state():
+    """Entfernt alle Vorschau-Keys aus dem Session State."""
+    for key in _FC_PREVIEW_KEYS:
+        st.session_state.pop(key, None)
+
 
 def render_forecast_section(conn, conn_id, fund_id, fund_name, currency, commit_info):
     """Rendert die komplette Forecast-Sektion."""
@@ -132,15 +143,23 @@ def render_forecast_section(conn, conn_id, fund_id, fund_name, currency, commit_
                 conn_id, fund_id
             )
             if forecast:
+                preview_df, preview_metrics = _build_forecast_preview(forecast)
                 st.session_state['fc_preview'] = forecast
                 st.session_state['fc_model_name'] = selected_model
+                st.session_state['fc_preview_df'] = preview_df
+                st.session_state['fc_preview_metrics'] = preview_metrics
             else:
                 st.warning("Forecast konnte nicht berechnet werden. Prüfen Sie die Parameter.")
 
         # --- Vorschau ---
         if 'fc_preview' in st.session_state and st.session_state['fc_preview']:
             forecast = st.session_state['fc_preview']
-            _render_forecast_preview(forecast, currency)
+            _render_forecast_preview(
+                forecast,
+                st.session_state.get('fc_preview_df'),
+                st.session_state.get('fc_preview_metrics'),
+                currency
+            )
 
             # --- Speichern / Verwerfen ---
             sv1, sv2 = st.columns(2)
@@ -152,8 +171,7 @@ def render_forecast_section(conn, conn_id, fund_id, fund_name, currency, commit_
                     )
             with sv2:
                 if st.button("🗑️ Verwerfen", key="fc_discard"):
-                    st.session_state.pop('fc_preview', None)
-                    st.session_state.pop('fc_model_name', None)
+                    _clear_forecast_preview_state()
                     st.rerun()
 
 
@@ -331,9 +349,9 @@ def _render_model_params(model_key, conn_id, fund_id, commitment, lifetime, vint
                 options=all_funds['fund_name'].tolist(),
                 key="fc_hist_source"
             )
-            source_row = all_funds[all_funds['fund_name'] == source_fund_name]
-            if not source_row.empty:
-                params['source_fund_id'] = int(source_row.iloc[0]['fund_id'])
+            source_fund_id = get_fund_name_to_id_cached(conn_id).get(source_fund_name)
+            if source_fund_id is not None:
+                params['source_fund_id'] = source_fund_id
 
     return params
 
@@ -416,11 +434,10 @@ def _compute_forecast(model_key, commitment, lifetime, vintage_year,
         if hist_df.empty:
             return []
 
-        hist_cashflows = hist_df.to_dict('records')
-        # date-Spalte konvertieren
-        for cf in hist_cashflows:
-            if hasattr(cf['date'], 'date'):
-                cf['date'] = cf['date'].date()
+        # date-Spalte spaltenweise konvertieren (cached DataFrame nicht mutieren)
+        hist_cashflows = hist_df.assign(
+            date=pd.to_datetime(hist_df['date']).dt.date
+        ).to_dict('records')
 
         source_info = get_fund_commitment_info_cached(conn_id, source_fund_id)
         hist_commitment = source_info.get('commitment_amount') or 0
@@ -434,52 +451,75 @@ def _compute_forecast(model_key, commitment, lifetime, vintage_year,
     return []
 
 
-def _render_forecast_preview(forecast, currency):
-    """Zeigt Forecast-Vorschau mit Chart und Tabelle."""
-
-    st.markdown("### Vorschau")
+def _build_forecast_preview(forecast):
+    """Aggregiert den Forecast einmalig für die Vorschau.
 
+    Returns:
+        (DataFrame mit Jahr, Calls, Distributions, Netto; dict mit Summary-Metriken)
+    """
     # Summary
     total_calls = sum(e['amount'] for e in forecast if e['type'] in OUTFLOW_TYPES)
     total_dists = sum(e['amount'] for e in forecast
                       if e['type'] not in OUTFLOW_TYPES)
-    net = total_dists - total_calls
-    dpi = total_dists / total_calls if total_calls > 0 else 0.0
+    metrics = {
+        'total_calls': total_calls,
+        'total_dists': total_dists,
+        'net': total_dists - total_calls,
+        'dpi': total_dists / total_calls if total_calls > 0 else 0.0,
+    }
+
+    # Tabelle (aggregiert nach Jahr) — [Calls, Distributions] pro Jahr
+    table_data = defaultdict(lambda: [0.0, 0.0])
+    for entry in forecast:
+        year = entry['date'].year if hasattr(entry['date'], 'year') else entry['date']
+        table_data[year][0 if entry['type'] in OUTFLOW_TYPES else 1] += entry['amount']
+
+    tdf = pd.DataFrame(
+        [(year, calls, dists, dists - calls)
+         for year, (calls, dists) in sorted(table_data.items())],
+        columns=['Jahr', 'Calls', 'Distributions', 'Netto']
+    )
+    tdf[['Calls', 'Distributions', 'Netto']] = tdf[['Calls', 'Distributions', 'Netto']].round(0)
+    return tdf, metrics
+
+
+def _render_forecast_preview(forecast, preview_df, preview_metrics, currency):
+    """Zeigt Forecast-Vorschau mit Chart und Tabelle.
+
+    preview_df/preview_metrics stammen aus _build_forecast_preview und liegen
+    im Session State; fehlen sie (ältere Session), werden sie neu berechnet.
+    """
+
+    st.markdown("### Vorschau")
+
+    if preview_df is None or preview_metrics is None:
+        preview_df, preview_metrics = _build_forecast_preview(forecast)
 
     m1, m2, m3, m4 = st.columns(4)
     with m1:
-        st.metric("Total Calls", f"{total_calls:,.0f} {currency}")
+        st.metric("Total Calls", f"{preview_metrics['total_calls']:,.0f} {currency}")
     with m2:
-        st.metric("Total Distributions", f"{total_dists:,.0f} {currency}")
+        st.metric("Total Distributions", f"{preview_metrics['total_dists']:,.0f} {currency}")
     with m3:
-        st.metric("Netto", f"{net:,.0f} {currency}")
+        st.metric("Netto", f"{preview_metrics['net']:,.0f} {currency}")
     with m4:
-        st.metric("DPI", f"{dpi:.2f}x")
+        st.metric("DPI", f"{preview_metrics['dpi']:.2f}x")
 
     # Chart
-    fig = create_forecast_preview_chart(forecast, currency)
+    fig = create_forecast_preview_chart_from_df(preview_df, currency)
     if fig:
         st.pyplot(fig)
         plt.close(fig)
 
-    # Tabelle (aggregiert nach Jahr)
-    table_data = {}
-    for entry in forecast:
-        year = entry['date'].year if hasattr(entry['date'], 'year') else entry['date']
-        if year not in table_data:
-            table_data[year] = {'Jahr': year, 'Calls': 0.0, 'Distributions': 0.0}
-        if entry['type'] in OUTFLOW_TYPES:
-            table_data[year]['Calls'] += entry['amount']
-        else:
-            table_data[year]['Distributions'] += entry['amount']
-
-    if table_data:
-        tdf = pd.DataFrame(sorted(table_data.values(), key=lambda x: x['Jahr']))
-        tdf['Netto'] = tdf['Distributions'] - tdf['Calls']
-        tdf['Calls'] = tdf['Calls'].apply(lambda x: f"{x:,.0f}")
-        tdf['Distributions'] = tdf['Distributions'].apply(lambda x: f"{x:,.0f}")
-        tdf['Netto'] = tdf['Netto'].apply(lambda x: f"{x:,.0f}")
-        st.dataframe(tdf, hide_index=True, width='stretch')
+    if not preview_df.empty:
+        # Numerisch lassen (Arrow), Tausendertrennung übernimmt column_config
+        st.dataframe(
+            preview_df, hide_index=True, width='stretch',
+            column_config={
+                'Jahr': st.column_config.NumberColumn(format="%d"),
+                **amount_column_config(['Calls', 'Distributions', 'Netto']),
+            }
+        )
 
     st.caption(f"Forecast: {len(forecast)} Einträge generiert")
 
@@ -503,8 +543,7 @@ def _save_forecast(conn, conn_id, fund_id, forecast, scenario_name,
         count = bulk_insert_cashflows(conn, records)
         clear_cache()
         st.success(f"✅ {count} Forecast-Cashflows gespeichert ({scenario_name}).")
-        st.session_state.pop('fc_preview', None)
-        st.session_state.pop('fc_model_name', None)
+        _clear_forecast_preview_state()
         st.rerun()
     else:
         st.warning("Keine Forecast-Daten zum Speichern.")
@@ -12,8 +12,9 @@ import pandas as pd
 from datetime import date
 
 from database import clear_cache
-from cashflow_db import (
-    get_all_exchange_rates, delete_exchange_rate, insert_exchange_rate
+from cashflow_db import delete_exchange_rate, insert_exchange_rate
+from cashflow_queries import (
+    get_exchange_rates_cached, get_exchange_rate_delete_options_cached
 )
 
 COMMON_PAIRS = [
@@ -22,6 +23,14 @@ COMMON_PAIRS = [
 ]
 CURRENCIES = ['EUR', 'USD', 'CHF', 'GBP']
 
+# Import-Spaltenname (lowercase) → kanonischer Spaltenname
+FX_COLUMN_ALIASES = {
+    'von': 'from_currency', 'from': 'from_currency', 'from_currency': 'from_currency',
+    'nach': 'to_currency', 'to': 'to_currency', 'to_currency': 'to_currency',
+    'datum': 'rate_date', 'date': 'rate_date', 'rate_date': 'rate_date',
+    'rate': 'rate', 'kurs': 'rate', 'exchange_rate': 'rate',
+}
+
 
 def render_fx_management(conn, conn_id):
     """Rendert FX-Verwaltung im Admin-Tab."""
@@ -29,23 +38,19 @@ def render_fx_management(conn, conn_id):
     with st.expander("💱 Wechselkurse verwalten", expanded=False):
 
         # --- Bestehende Raten ---
-        rates = get_all_exchange_rates(conn)
+        rates_df = get_exchange_rates_cached(conn_id)
 
-        if rates:
+        if not rates_df.empty:
             st.markdown("**Bestehende Wechselkurse**")
-            rates_df = pd.DataFrame(rates)
-            display_df = rates_df[['from_currency', 'to_currency', 'rate_date', 'rate']].copy()
-            display_df.columns = ['Von', 'Nach', 'Datum', 'Rate']
-            display_df['Datum'] = pd.to_datetime(display_df['Datum']).dt.strftime('%Y-%m-%d')
-            display_df['Rate'] = display_df['Rate'].apply(lambda x: f"{x:.6f}")
-            st.dataframe(display_df, hide_index=True, width='stretch')
+            st.dataframe(
+                rates_df, hide_index=True, width='stretch',
+                column_order=['Von', 'Nach', 'Datum', 'Rate'],
+                column_config={'Rate': st.column_config.NumberColumn(format="%.6f")}
+            )
 
             # Löschen
             with st.popover("🗑️ Rate löschen"):
-                delete_options = {
-                    f"{r['from_currency']}/{r['to_currency']} {r['rate_date']} ({r['rate']:.4f})": r['rate_id']
-                    for r in rates
-                }
+                delete_options = get_exchange_rate_delete_options_cached(conn_id)
                 selected_delete = st.selectbox(
                     "Rate auswählen", options=list(delete_options.keys()),
                     key="fx_delete_select"
@@ -98,22 +103,16 @@ def render_fx_management(conn, conn_id):
         if uploaded is not None:
             try:
                 if uploaded.name.endswith('.csv'):
-                    import_df = pd.read_csv(uploaded)
+                    import_df = pd.read_csv(uploaded, engine='pyarrow')
                 else:
-                    import_df = pd.read_excel(uploaded)
+                    import_df = pd.read_excel(uploaded, engine='calamine')
 
                 # Spalten normalisieren
                 import_df.columns = [c.strip().lower() for c in import_df.columns]
-                col_map = {}
-                for c in import_df.columns:
-                    if c in ('von', 'from', 'from_currency'):
-                        col_map['from_currency'] = c
-                    elif c in ('nach', 'to', 'to_currency'):
-                        col_map['to_currency'] = c
-                    elif c in ('datum', 'date', 'rate_date'):
-                        col_map['rate_date'] = c
-                    elif c in ('rate', 'kurs', 'exchange_rate'):
-                        col_map['rate'] = c
+                col_map = {
+                    FX_COLUMN_ALIASES[c]: c
+                    for c in import_df.columns if c in FX_COLUMN_ALIASES
+                }
 
                 if len(col_map) < 4:
                     st.error("Konnte nicht alle Spalten zuordnen. Benötigt: Von, Nach, Datum, Rate")
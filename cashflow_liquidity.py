@@ -2,97 +2,21 @@
 Cashflow Planning Tool — Liquiditätsplanung Charts
 
 Charts:
-  1. Funding-Gap Balkendiagramm (Calls vs. Distributions pro Periode)
-  2. Cash-Reserve Liniendiagramm (Kontostand über Zeit)
-  3. Funding-Gap Wasserfall (kumulativer Funding-Bedarf)
+  1. Funding-Gap Balkendiagramm (Calls vs. Distributions pro Periode) — Altair
+  2. Cash-Reserve Liniendiagramm (Kontostand über Zeit) — Altair
+  3. Funding-Gap Wasserfall (kumulativer Funding-Bedarf) — Matplotlib
+
+1. und 2. werden als Vega-Lite im Browser gerendert; der Wasserfall bleibt
+Matplotlib (gestapelte Basen) und wird in der UI als PNG gecacht.
 """
 
+import altair as alt
 import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
+from matplotlib.collections import LineCollection
 import numpy as np
 import pandas as pd
 
 
-def create_funding_gap_chart(funding_gap_df, base_currency='EUR'):
-    """Balkendiagramm: Calls (rot) vs. Distributions (grün) pro Periode.
-    Linie: Netto-Funding-Bedarf.
-    """
-    if funding_gap_df is None or funding_gap_df.empty:
-        return None
-
-    fig, ax = plt.subplots(figsize=(14, 6))
-
-    x = np.arange(len(funding_gap_df))
-    width = 0.35
-
-    calls = funding_gap_df['expected_calls'].abs()
-    dists = funding_gap_df['expected_distributions']
-
-    ax.bar(x - width / 2, -calls, width, label='Erwartete Abrufe',
-           color='#ef5350', alpha=0.85)
-    ax.bar(x + width / 2, dists, width, label='Erwartete Ausschüttungen',
-           color='#66bb6a', alpha=0.85)
-
-    # Netto-Linie
-    ax.plot(x, funding_gap_df['net_funding_need'], color='#1565c0',
-            linewidth=2, marker='o', markersize=5, label='Netto-Funding-Bedarf',
-            zorder=3)
-
-    ax.axhline(y=0, color='gray', linestyle='-', linewidth=0.5)
-
-    ax.set_title('Funding-Gap Analyse', fontsize=14, fontweight='bold')
-    ax.set_xlabel('Periode')
-    ax.set_ylabel(f'Betrag ({base_currency})')
-    ax.set_xticks(x)
-    ax.set_xticklabels(funding_gap_df['period_label'], rotation=45, ha='right')
-    ax.grid(True, alpha=0.3, axis='y')
-    ax.legend(loc='best')
-    plt.tight_layout()
-
-    return fig
-
-
-def create_cash_reserve_chart(cash_reserve_df, base_currency='EUR'):
-    """Liniendiagramm: Kontostand über Zeit.
-    Rote Zone unter 0. Grüne Zone über 0.
-    Horizontale Warnlinie bei 0.
-    """
-    if cash_reserve_df is None or cash_reserve_df.empty:
-        return None
-
-    fig, ax = plt.subplots(figsize=(14, 6))
-
-    dates = pd.to_datetime(cash_reserve_df['date'])
-    balance = cash_reserve_df['balance']
-
-    ax.plot(dates, balance, color='#1565c0', linewidth=2, label='Kontostand',
-            zorder=3)
-
-    # Farbflächen
-    ax.fill_between(dates, balance, 0,
-                    where=(balance >= 0), color='#4caf50', alpha=0.2,
-                    interpolate=True, label='Deckung')
-    ax.fill_between(dates, balance, 0,
-                    where=(balance < 0), color='#f44336', alpha=0.3,
-                    interpolate=True, label='Unterdeckung')
-
-    # Nulllinie
-    ax.axhline(y=0, color='#c62828', linestyle='--', linewidth=1.5,
-               label='Null-Linie', zorder=2)
-
-    ax.set_title('Cash-Reserve Simulation', fontsize=14, fontweight='bold')
-    ax.set_xlabel('Datum')
-    ax.set_ylabel(f'Kontostand ({base_currency})')
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
-    ax.xaxis.set_major_locator(mdates.AutoDateLocator())
-    plt.xticks(rotation=45)
-    ax.grid(True, alpha=0.3)
-    ax.legend(loc='best')
-    plt.tight_layout()
-
-    return fig
-
-
 def create_funding_gap_waterfall_chart(funding_gap_df, base_currency='EUR'):
     """Wasserfall-Diagramm: kumulativer Funding-Bedarf."""
     if funding_gap_df is None or funding_gap_df.empty:
@@ -101,20 +25,17 @@ def create_funding_gap_waterfall_chart(funding_gap_df, base_currency='EUR'):
     fig, ax = plt.subplots(figsize=(14, 6))
 
     labels = funding_gap_df['period_label'].tolist()
-    values = funding_gap_df['net_funding_need'].tolist()
-    cumulative = funding_gap_df['cumulative_funding_need'].tolist()
+    values = funding_gap_df['net_funding_need'].to_numpy(dtype=float)
+    cumulative = funding_gap_df['cumulative_funding_need'].to_numpy(dtype=float)
 
     x = np.arange(len(labels))
 
-    # Wasserfall-Balken
-    bottoms = []
-    for i in range(len(cumulative)):
-        if i == 0:
-            bottoms.append(0)
-        else:
-            bottoms.append(cumulative[i - 1])
+    # Wasserfall-Balken: Basis = kumulativer Wert der Vorperiode
+    bottoms = np.empty_like(cumulative)
+    bottoms[0] = 0
+    bottoms[1:] = cumulative[:-1]
 
-    bar_colors = ['#ef5350' if v < 0 else '#66bb6a' for v in values]
+    bar_colors = np.where(values < 0, '#ef5350', '#66bb6a')
 
     ax.bar(x, values, bottom=bottoms, color=bar_colors, alpha=0.85,
            edgecolor='white', linewidth=0.5)
@@ -123,11 +44,15 @@ def create_funding_gap_waterfall_chart(funding_gap_df, base_currency='EUR'):
     ax.plot(x, cumulative, color='#1a237e', linewidth=2, marker='D',
             markersize=5, label='Kumulativer Bedarf', zorder=3)
 
-    # Verbindungslinien zwischen Balken
-    for i in range(len(x) - 1):
-        ax.plot([x[i] + 0.4, x[i + 1] - 0.4],
-                [cumulative[i], cumulative[i]],
-                color='gray', linestyle=':', linewidth=0.8)
+    # Verbindungslinien zwischen Balken (ein Artist für alle Segmente)
+    if len(x) > 1:
+        cum_arr = cumulative[:-1]
+        segments = np.stack([
+            np.column_stack([x[:-1] + 0.4, cum_arr]),
+            np.column_stack([x[1:] - 0.4, cum_arr]),
+        ], axis=1)
+        ax.add_collection(LineCollection(segments, colors='gray',
+                                         linestyles=':', linewidths=0.8))
 
     ax.axhline(y=0, color='gray', linestyle='-', linewidth=0.5)
 
@@ -142,3 +67,94 @@ def create_funding_gap_waterfall_chart(funding_gap_df, base_currency='EUR'):
     plt.tight_layout()
 
     return fig
+
+
+# ============================================================================
+# ALTAIR (UI)
+# ============================================================================
+
+def create_funding_gap_altair_chart(funding_gap_df, base_currency='EUR'):
+    """Funding-Gap Balkendiagramm für st.altair_chart: Calls (rot) vs.
+    Distributions (grün) pro Periode, Linie: Netto-Funding-Bedarf.
+    """
+    if funding_gap_df is None or funding_gap_df.empty:
+        return None
+
+    bars_df = pd.DataFrame({
+        'period_label': funding_gap_df['period_label'],
+        'Erwartete Abrufe': -funding_gap_df['expected_calls'].abs(),
+        'Erwartete Ausschüttungen': funding_gap_df['expected_distributions'],
+    }).melt(id_vars='period_label', var_name='Typ', value_name='Betrag')
+
+    x = alt.X('period_label:N', title='Periode', sort=None)
+
+    bars = alt.Chart(bars_df).mark_bar(opacity=0.85).encode(
+        x=x,
+        xOffset='Typ:N',
+        y=alt.Y('Betrag:Q', title=f'Betrag ({base_currency})'),
+        color=alt.Color(
+            'Typ:N',
+            scale=alt.Scale(domain=['Erwartete Abrufe', 'Erwartete Ausschüttungen'],
+                            range=['#ef5350', '#66bb6a']),
+            legend=alt.Legend(title=None, orient='top'),
+        ),
+        tooltip=[alt.Tooltip('period_label:N', title='Periode'), 'Typ:N',
+                 alt.Tooltip('Betrag:Q', format=',.0f')],
+    )
+
+    net_line = alt.Chart(funding_gap_df).mark_line(
+        color='#1565c0', strokeWidth=2, point=True
+    ).encode(
+        x=x,
+        y='net_funding_need:Q',
+        tooltip=[alt.Tooltip('period_label:N', title='Periode'),
+                 alt.Tooltip('net_funding_need:Q', title='Netto-Funding-Bedarf',
+                             format=',.0f')],
+    )
+
+    zero_rule = alt.Chart(pd.DataFrame({'y': [0]})).mark_rule(color='gray').encode(y='y:Q')
+
+    return (bars + net_line + zero_rule).properties(
+        title='Funding-Gap Analyse', height=400
+    )
+
+
+def create_cash_reserve_altair_chart(cash_reserve_df, base_currency='EUR'):
+    """Cash-Reserve Liniendiagramm (Kontostand über Zeit) für st.altair_chart,
+    mit Deckung (grün) / Unterdeckung (rot) als Fläche und Warnlinie bei 0.
+    Erwartet date als datetime64 (wie von get_cash_reserve_simulation_cached geliefert).
+    """
+    if cash_reserve_df is None or cash_reserve_df.empty:
+        return None
+
+    base = alt.Chart(cash_reserve_df).encode(
+        x=alt.X('date:T', title='Datum'),
+    ).transform_calculate(
+        deckung='max(datum.balance, 0)',
+        unterdeckung='min(datum.balance, 0)',
+    )
+
+    # Flächen wie fill_between: positiver Kontostand grün, negativer rot
+    coverage_area = base.mark_area(color='#4caf50', opacity=0.2).encode(
+        y='deckung:Q', y2=alt.datum(0),
+    )
+    shortfall_area = base.mark_area(color='#f44336', opacity=0.3).encode(
+        y='unterdeckung:Q', y2=alt.datum(0),
+    )
+
+    balance_line = alt.Chart(cash_reserve_df).mark_line(
+        color='#1565c0', strokeWidth=2
+    ).encode(
+        x=alt.X('date:T', title='Datum'),
+        y=alt.Y('balance:Q', title=f'Kontostand ({base_currency})'),
+        tooltip=[alt.Tooltip('date:T', title='Datum', format='%Y-%m-%d'),
+                 alt.Tooltip('balance:Q', title='Kontostand', format=',.0f')],
+    )
+
+    zero_rule = alt.Chart(pd.DataFrame({'y': [0]})).mark_rule(
+        color='#c62828', strokeDash=[6, 4], strokeWidth=1.5
+    ).encode(y='y:Q')
+
+    return (coverage_area + shortfall_area + balance_line + zero_rule).properties(
+        title='Cash-Reserve Simulation', height=400
+    )
@@ -9,8 +9,6 @@ Rendert:
 """
 
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 
 from cashflow_queries import (
     get_all_funds_for_cashflow_cached,
@@ -19,11 +17,12 @@ from cashflow_queries import (
     get_cash_reserve_simulation_cached,
 )
 from cashflow_liquidity import (
-    create_funding_gap_chart,
-    create_cash_reserve_chart,
+    create_funding_gap_altair_chart,
+    create_cash_reserve_altair_chart,
     create_funding_gap_waterfall_chart,
 )
 from cashflow_export import export_liquidity_excel
+from cashflow_ui_helpers import amount_column_config, chart_png
 
 CURRENCY_OPTIONS = ['EUR', 'USD', 'CHF', 'GBP']
 
@@ -57,7 +56,8 @@ def render_liquidity_section(conn, conn_id):
         return
 
     selected_df = all_funds_df[all_funds_df['fund_name'].isin(selected_names)]
-    fund_ids = tuple(int(x) for x in selected_df['fund_id'].tolist())
+    # Sortiert = kanonischer Cache-Key, unabhängig von der Auswahlreihenfolge
+    fund_ids = tuple(sorted(int(x) for x in selected_df['fund_id'].tolist()))
 
     pc1, pc2, pc3, pc4 = st.columns(4)
     with pc1:
@@ -115,73 +115,77 @@ def render_liquidity_section(conn, conn_id):
             else:
                 st.metric("Perioden mit Unterdeckung", "–")
 
-    # --- Tabs ---
-    tab1, tab2, tab3 = st.tabs(["Funding-Gap", "Cash-Reserve", "Wasserfall"])
+    # --- Ansicht (nur die gewählte wird gerendert, statt aller st.tabs-Bodies) ---
+    liq_view = st.radio(
+        "Ansicht", options=["Funding-Gap", "Cash-Reserve", "Wasserfall"],
+        horizontal=True, key="liq_active_tab", label_visibility="collapsed"
+    )
 
-    with tab1:
+    if liq_view == "Funding-Gap":
         if not funding_gap_df.empty:
-            fig = create_funding_gap_chart(funding_gap_df, base_currency)
-            if fig:
-                st.pyplot(fig)
-                plt.close(fig)
+            chart = create_funding_gap_altair_chart(funding_gap_df, base_currency)
+            if chart is not None:
+                st.altair_chart(chart)
 
             st.markdown("**Daten**")
-            display_fg = funding_gap_df.copy()
-            for col in ['expected_calls', 'expected_distributions',
-                       'net_funding_need', 'cumulative_funding_need']:
-                if col in display_fg.columns:
-                    display_fg[col] = display_fg[col].apply(lambda x: f"{x:,.0f}")
+            display_fg = funding_gap_df.round(0)
             display_fg.columns = ['Periode', f'Erw. Abrufe ({base_currency})',
                                  f'Erw. Ausschüttungen ({base_currency})',
                                  f'Netto ({base_currency})',
                                  f'Kumulativ ({base_currency})']
-            st.dataframe(display_fg, hide_index=True, width='stretch')
+            st.dataframe(display_fg, hide_index=True, width='stretch',
+                         column_config=amount_column_config(display_fg.columns[1:]))
         else:
             st.info("Keine geplanten Cashflows (is_actual=False) für Funding-Gap vorhanden.")
-
-    with tab2:
+    elif liq_view == "Cash-Reserve":
         if not cash_reserve_df.empty:
-            fig = create_cash_reserve_chart(cash_reserve_df, base_currency)
-            if fig:
-                st.pyplot(fig)
-                plt.close(fig)
+            chart = create_cash_reserve_altair_chart(cash_reserve_df, base_currency)
+            if chart is not None:
+                st.altair_chart(chart)
 
             st.markdown("**Daten**")
-            display_cr = cash_reserve_df.copy()
-            display_cr['date'] = pd.to_datetime(display_cr['date']).dt.strftime('%Y-%m-%d')
-            for col in ['inflow', 'outflow', 'net', 'balance']:
-                if col in display_cr.columns:
-                    display_cr[col] = display_cr[col].apply(lambda x: f"{x:,.0f}")
+            display_cr = cash_reserve_df.round(0)
+            display_cr['date'] = display_cr['date'].dt.strftime('%Y-%m-%d')
             display_cr.columns = ['Datum', f'Zufluss ({base_currency})',
                                  f'Abfluss ({base_currency})',
                                  f'Netto ({base_currency})',
                                  f'Kontostand ({base_currency})']
-            st.dataframe(display_cr, hide_index=True, width='stretch')
+            st.dataframe(display_cr, hide_index=True, width='stretch',
+                         column_config=amount_column_config(display_cr.columns[1:]))
         else:
             st.info("Keine Cashflow-Daten für Cash-Reserve Simulation vorhanden.")
-
-    with tab3:
+    else:
         if not funding_gap_df.empty:
-            fig = create_funding_gap_waterfall_chart(funding_gap_df, base_currency)
-            if fig:
-                st.pyplot(fig)
-                plt.close(fig)
+            png = chart_png(
+                create_funding_gap_waterfall_chart, funding_gap_df, base_currency
+            )
+            if png:
+                st.image(png, width='stretch')
         else:
             st.info("Keine Daten für Wasserfall-Diagramm.")
 
     # --- Export ---
     if not funding_gap_df.empty or not cash_reserve_df.empty:
-        params = {
-            'start_balance': start_balance,
-            'scenario': selected_scenario,
-        }
-        excel_data = export_liquidity_excel(
-            funding_gap_df, cash_reserve_df, params, base_currency
-        )
-        st.download_button(
-            label="Liquidität Export (Excel)",
-            data=excel_data,
-            file_name=f"liquidity_{base_currency}_{selected_scenario}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            key="liq_export_btn"
-        )
+        # Excel erst auf Klick erzeugen; bei geänderter Auswahl verwerfen
+        export_key = (fund_ids, base_currency, selected_scenario, start_balance, period)
+        if st.session_state.get("liq_excel_key") != export_key:
+            st.session_state.pop("liq_excel_bytes", None)
+
+        if st.button("Excel vorbereiten", key="liq_prep_excel"):
+            params = {
+                'start_balance': start_balance,
+                'scenario': selected_scenario,
+            }
+            st.session_state["liq_excel_bytes"] = export_liquidity_excel(
+                funding_gap_df, cash_reserve_df, params, base_currency
+            )
+            st.session_state["liq_excel_key"] = export_key
+
+        if "liq_excel_bytes" in st.session_state:
+            st.download_button(
+                label="Liquidität Export (Excel)",
+                data=st.session_state["liq_excel_bytes"],
+                file_name=f"liquidity_{base_currency}_{selected_scenario}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                key="liq_export_btn"
+            )
@@ -12,19 +12,22 @@ Status-Gruppen:
     Abgelehnt: declined
 """
 
+from psycopg2.extras import RealDictCursor
+
+
 # ============================================================================
 # CONSTANTS
 # ============================================================================
 
 VALID_TRANSITIONS = {
-    'screening': ['due_diligence', 'declined'],
-    'due_diligence': ['negotiation', 'declined'],
-    'negotiation': ['committed', 'declined'],
-    'committed': ['active'],
-    'active': ['harvesting'],
-    'harvesting': ['closed'],
-    'declined': [],
-    'closed': [],
+    'screening': frozenset({'due_diligence', 'declined'}),
+    'due_diligence': frozenset({'negotiation', 'declined'}),
+    'negotiation': frozenset({'committed', 'declined'}),
+    'committed': frozenset({'active'}),
+    'active': frozenset({'harvesting'}),
+    'harvesting': frozenset({'closed'}),
+    'declined': frozenset(),
+    'closed': frozenset(),
 }
 
 PIPELINE_STATUSES = ('screening', 'due_diligence', 'negotiation')
@@ -89,6 +92,17 @@ def ensure_pipeline_tables(conn):
         cursor.execute(
             "CREATE INDEX IF NOT EXISTS idx_pipeline_meta_fund ON fund_pipeline_meta(fund_id)"
         )
+        # Covering-Index für den LEFT JOIN in get_funds_by_status_group (Index-Only-Scan)
+        cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_pipeline_meta_fund_id_covering
+        ON fund_pipeline_meta(fund_id)
+        INCLUDE (probability, expected_commitment, dd_score, next_step,
+                 next_step_date, source, contact_person)
+        """)
+        # Status-Filter + Sortierung nach Name in get_funds_by_status_group
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_funds_status_name ON funds(status, fund_name)"
+        )
 
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS fund_status_history (
@@ -116,7 +130,7 @@ def ensure_pipeline_tables(conn):
 
 def get_pipeline_meta(conn, fund_id):
     """Holt Pipeline-Metadaten für einen Fonds. Returns dict oder None."""
-    with conn.cursor() as cursor:
+    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
         cursor.execute("""
         SELECT meta_id, fund_id, probability, dd_score, dd_notes, decline_reason,
                expected_commitment, expected_commitment_date, source, contact_person,
@@ -124,11 +138,7 @@ def get_pipeline_meta(conn, fund_id):
         FROM fund_pipeline_meta
         WHERE fund_id = %s
         """, (fund_id,))
-        row = cursor.fetchone()
-        if not row:
-            return None
-        columns = [desc[0] for desc in cursor.description]
-        return dict(zip(columns, row))
+        return cursor.fetchone()
 
 
 def upsert_pipeline_meta(conn, fund_id, **kwargs):
@@ -170,36 +180,43 @@ def upsert_pipeline_meta(conn, fund_id, **kwargs):
 # CRUD — Status Management
 # ============================================================================
 
+def _update_status_with_history(cursor, fund_id, old_status, new_status,
+                                changed_by, reason):
+    """UPDATE funds.status + INSERT fund_status_history als ein Statement."""
+    cursor.execute("""
+    WITH upd AS (
+        UPDATE funds SET status = %s WHERE fund_id = %s
+    )
+    INSERT INTO fund_status_history (fund_id, old_status, new_status, changed_by, change_reason)
+    VALUES (%s, %s, %s, %s, %s)
+    """, (new_status, fund_id, fund_id, old_status, new_status, changed_by, reason))
+
+
 def change_fund_status(conn, fund_id, new_status, changed_by='system', reason=''):
     """Validiert Transition, loggt in fund_status_history, updated funds.status."""
     with conn.cursor() as cursor:
-        # Aktuellen Status holen
-        cursor.execute("SELECT status FROM funds WHERE fund_id = %s", (fund_id,))
+        # Aktuellen Status holen (Zeile bis zum Commit sperren)
+        cursor.execute("SELECT status FROM funds WHERE fund_id = %s FOR UPDATE", (fund_id,))
         row = cursor.fetchone()
         if not row:
+            # Transaktion beenden, sonst bleibt der FOR-UPDATE-Lock bestehen
+            conn.rollback()
             raise ValueError(f"Fund {fund_id} nicht gefunden")
 
         old_status = row[0] or 'active'
 
         # Transition validieren
-        valid = VALID_TRANSITIONS.get(old_status, [])
+        valid = VALID_TRANSITIONS.get(old_status, frozenset())
         if new_status not in valid:
+            conn.rollback()
             raise ValueError(
                 f"Ungültiger Übergang: {old_status} → {new_status}. "
-                f"Erlaubt: {valid}"
+                f"Erlaubt: {sorted(valid)}"
             )
 
-        # Status aktualisieren
-        cursor.execute(
-            "UPDATE funds SET status = %s WHERE fund_id = %s",
-            (new_status, fund_id)
-        )
-
-        # History loggen
-        cursor.execute("""
-        INSERT INTO fund_status_history (fund_id, old_status, new_status, changed_by, change_reason)
-        VALUES (%s, %s, %s, %s, %s)
-        """, (fund_id, old_status, new_status, changed_by, reason))
+        # Status aktualisieren + History loggen
+        _update_status_with_history(cursor, fund_id, old_status, new_status,
+                                    changed_by, reason)
 
         conn.commit()
 
@@ -215,17 +232,14 @@ def force_change_fund_status(conn, fund_id, new_status, changed_by='admin', reas
         old_status = row[0] or 'active'
         if old_status == new_status:
             return
-        cursor.execute("UPDATE funds SET status = %s WHERE fund_id = %s", (new_status, fund_id))
-        cursor.execute("""
-        INSERT INTO fund_status_history (fund_id, old_status, new_status, changed_by, change_reason)
-        VALUES (%s, %s, %s, %s, %s)
-        """, (fund_id, old_status, new_status, changed_by, reason))
+        _update_status_with_history(cursor, fund_id, old_status, new_status,
+                                    changed_by, reason)
         conn.commit()
 
 
 def get_fund_status_history(conn, fund_id):
     """Holt Status-Änderungshistorie für einen Fonds."""
-    with conn.cursor() as cursor:
+    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
         cursor.execute("""
         SELECT history_id, fund_id, old_status, new_status, changed_by,
                change_reason, changed_at
@@ -233,24 +247,42 @@ def get_fund_status_history(conn, fund_id):
         WHERE fund_id = %s
         ORDER BY changed_at DESC
         """, (fund_id,))
-        columns = [desc[0] for desc in cursor.description]
-        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return cursor.fetchall()
+
+
+def get_all_status_history(conn):
+    """Holt die Status-Historie aller Fonds inkl. fund_name (ein Query statt N+1)."""
+    placeholders = ','.join(['%s'] * len(ALL_STATUSES))
+    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+        cursor.execute(f"""
+        SELECT h.history_id, h.fund_id, f.fund_name, h.old_status, h.new_status,
+               h.changed_by, h.change_reason, h.changed_at
+        FROM fund_status_history h
+        JOIN funds f ON h.fund_id = f.fund_id
+        WHERE f.status IN ({placeholders})
+        ORDER BY h.changed_at DESC
+        """, ALL_STATUSES)
+        return cursor.fetchall()
 
 
 def get_funds_by_status_group(conn, group='pipeline'):
     """Holt Fonds nach Status-Gruppe.
     group: 'pipeline', 'active', 'declined', 'all'
     """
-    with conn.cursor() as cursor:
-        if group == 'pipeline':
-            statuses = PIPELINE_STATUSES
-        elif group == 'active':
-            statuses = ACTIVE_STATUSES
-        elif group == 'declined':
-            statuses = ('declined',)
-        else:
-            statuses = ALL_STATUSES
-
+    if group == 'pipeline':
+        statuses = PIPELINE_STATUSES
+    elif group == 'active':
+        statuses = ACTIVE_STATUSES
+    elif group == 'declined':
+        statuses = ('declined',)
+    else:
+        statuses = ALL_STATUSES
+    return get_funds_by_statuses(conn, statuses)
+
+
+def get_funds_by_statuses(conn, statuses):
+    """Holt Fonds mit einem der angegebenen Status (inkl. GP + Pipeline-Meta)."""
+    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
         placeholders = ','.join(['%s'] * len(statuses))
         cursor.execute(f"""
         SELECT f.fund_id, f.fund_name, f.status, f.currency, f.vintage_year,
@@ -264,9 +296,8 @@ def get_funds_by_status_group(conn, group='pipeline'):
         LEFT JOIN fund_pipeline_meta pm ON f.fund_id = pm.fund_id
         WHERE f.status IN ({placeholders})
         ORDER BY f.fund_name
-        """, statuses)
-        columns = [desc[0] for desc in cursor.description]
-        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        """, list(statuses))
+        return cursor.fetchall()
 
 
 # ============================================================================
@@ -289,17 +320,17 @@ def create_pipeline_fund(conn, fund_name, gp_id, strategy, geography,
               currency, vintage_year))
         fund_id = cursor.fetchone()[0]
 
+        # Pipeline-Meta + initialer History-Eintrag in einem Statement (ein Round-Trip)
         cursor.execute("""
-        INSERT INTO fund_pipeline_meta
-            (fund_id, probability, expected_commitment, source, contact_person)
-        VALUES (%s, %s, %s, %s, %s)
-        """, (fund_id, probability, expected_commitment, source, contact_person))
-
-        # Initial history entry
-        cursor.execute("""
+        WITH meta AS (
+            INSERT INTO fund_pipeline_meta
+                (fund_id, probability, expected_commitment, source, contact_person)
+            VALUES (%s, %s, %s, %s, %s)
+        )
         INSERT INTO fund_status_history (fund_id, old_status, new_status, changed_by, change_reason)
         VALUES (%s, NULL, 'screening', 'system', 'Neuer Pipeline-Fonds erstellt')
-        """, (fund_id,))
+        """, (fund_id, probability, expected_commitment, source, contact_person,
+              fund_id))
 
         conn.commit()
         return fund_id
@@ -1,19 +1,24 @@
 """
 Cashflow Planning Tool — Gecachte Pipeline-Queries
 
-Alle Funktionen nutzen @st.cache_data(ttl=300) mit _conn_id als Cache-Buster.
+Alle Funktionen nutzen @st.cache_data(ttl=300, max_entries=...) mit _conn_id als Cache-Buster.
+Das Kanban-Board liegt in @st.cache_resource (geteiltes Objekt, nur lesen).
 """
 
+from collections import defaultdict
+
 import pandas as pd
+import pyarrow as pa
 import streamlit as st
 from database import get_connection
 from cashflow_pipeline_db import (
-    get_funds_by_status_group, get_pipeline_meta, get_fund_status_history,
+    get_funds_by_status_group, get_funds_by_statuses, get_pipeline_meta, get_fund_status_history,
+    get_all_status_history,
     PIPELINE_STATUSES, STATUS_LABELS,
 )
 
 
-@st.cache_data(ttl=300)
+@st.cache_data(ttl=300, max_entries=8)
 def get_pipeline_summary_cached(_conn_id):
     """Pipeline-KPIs: Anzahl, gewichtetes Commitment, Avg DD-Score, nächste Deadline."""
     with get_connection() as conn:
@@ -25,48 +30,42 @@ def get_pipeline_summary_cached(_conn_id):
             'by_status_count': {},
             'probability_weighted_commitment': 0.0,
             'avg_dd_score': 0.0,
-            'upcoming_next_steps': [],
+            'next_deadline': None,
         }
 
-    by_status = {}
-    total_weighted = 0.0
-    dd_scores = []
-    upcoming = []
-
-    for f in funds:
-        status = f['status']
-        by_status[status] = by_status.get(status, 0) + 1
+    df = pd.DataFrame(funds)
+    prob = pd.to_numeric(df['probability'], errors='coerce').fillna(0) / 100.0
+    exp_commit = pd.to_numeric(df['expected_commitment'], errors='coerce').fillna(0)
+    dd_scores = pd.to_numeric(df['dd_score'], errors='coerce')
+
+    # Nur die nächste Deadline wird angezeigt → eine Zeile statt Top-5-Liste
+    upcoming_df = df.loc[df['next_step_date'].notna(),
+                         ['fund_name', 'next_step', 'next_step_date']]
+    next_deadline = None
+    if not upcoming_df.empty:
+        upcoming_df = upcoming_df.assign(next_step=upcoming_df['next_step'].fillna(''))
+        next_deadline = upcoming_df.sort_values('next_step_date', kind='stable').iloc[0].to_dict()
 
-        prob = (f.get('probability') or 0) / 100.0
-        exp_commit = f.get('expected_commitment') or 0
-        total_weighted += prob * exp_commit
+    return {
+        'total_pipeline': len(df),
+        'by_status_count': {k: int(v) for k, v in df['status'].value_counts(sort=False).items()},
+        'probability_weighted_commitment': float((prob * exp_commit).sum()),
+        'avg_dd_score': float(dd_scores.mean()) if dd_scores.notna().any() else 0.0,
+        'next_deadline': next_deadline,
+    }
 
-        dd = f.get('dd_score')
-        if dd is not None:
-            dd_scores.append(dd)
 
-        ns_date = f.get('next_step_date')
-        if ns_date is not None:
-            upcoming.append({
-                'fund_name': f['fund_name'],
-                'next_step': f.get('next_step') or '',
-                'next_step_date': ns_date,
-            })
+_STATUS_LABEL_CATEGORIES = list(STATUS_LABELS.values())
 
-    upcoming.sort(key=lambda x: x['next_step_date'])
 
-    return {
-        'total_pipeline': len(funds),
-        'by_status_count': by_status,
-        'probability_weighted_commitment': total_weighted,
-        'avg_dd_score': sum(dd_scores) / len(dd_scores) if dd_scores else 0.0,
-        'upcoming_next_steps': upcoming[:5],
-    }
+def _status_labels(series):
+    """Status-Codes → Anzeige-Labels als Categorical (einmal beim Laden statt pro Render)."""
+    return pd.Categorical(series.map(STATUS_LABELS), categories=_STATUS_LABEL_CATEGORIES)
 
 
-@st.cache_data(ttl=300)
+@st.cache_data(ttl=300, max_entries=32)
 def get_pipeline_funds_cached(_conn_id, status_filter=None):
-    """Pipeline-Fonds als DataFrame."""
+    """Pipeline-Fonds als DataFrame (inkl. status_label)."""
     with get_connection() as conn:
         funds = get_funds_by_status_group(conn, 'pipeline')
 
@@ -76,38 +75,56 @@ def get_pipeline_funds_cached(_conn_id, status_filter=None):
     df = pd.DataFrame(funds)
     if status_filter:
         df = df[df['status'] == status_filter]
+    df['status_label'] = _status_labels(df['status'])
 
     return df
 
 
-@st.cache_data(ttl=300)
+@st.cache_data(ttl=120, max_entries=32)
+def get_pipeline_funds_filtered_cached(_conn_id, statuses):
+    """Pipeline-Fonds mit Status-Filter im SQL (inkl. status_label).
+    statuses: sortiertes Tuple."""
+    with get_connection() as conn:
+        funds = get_funds_by_statuses(conn, statuses)
+
+    if not funds:
+        return pd.DataFrame()
+
+    df = pd.DataFrame(funds)
+    df['status_label'] = _status_labels(df['status'])
+    return df
+
+
+@st.cache_data(ttl=300, max_entries=32)
 def get_pipeline_history_cached(_conn_id, fund_id=None):
-    """Status-Änderungshistorie. fund_id=None → alle Pipeline-Fonds."""
+    """Status-Änderungshistorie als DataFrame (inkl. old/new_status_label).
+    fund_id=None → alle Pipeline-Fonds."""
     with get_connection() as conn:
         if fund_id:
-            return get_fund_status_history(conn, fund_id)
-        # Alle Pipeline-Fonds
-        funds = get_funds_by_status_group(conn, 'all')
-        all_history = []
-        for f in funds:
-            history = get_fund_status_history(conn, f['fund_id'])
-            for h in history:
-                h['fund_name'] = f['fund_name']
-            all_history.extend(history)
-        all_history.sort(key=lambda x: x['changed_at'], reverse=True)
-        return all_history
-
-
-@st.cache_data(ttl=60)
+            history = get_fund_status_history(conn, fund_id)
+        else:
+            # Alle Fonds (ein JOIN-Query, bereits nach changed_at DESC sortiert)
+            history = get_all_status_history(conn)
+
+    if not history:
+        return pd.DataFrame()
+
+    # Arrow-backed statt DataFrame aus list-of-dicts (schneller, weniger Speicher)
+    df = pa.Table.from_pylist(history).to_pandas(types_mapper=pd.ArrowDtype)
+    df['old_status_label'] = _status_labels(df['old_status'])
+    df['new_status_label'] = _status_labels(df['new_status'])
+    return df
+
+
+@st.cache_resource(ttl=60, max_entries=8)
 def get_pipeline_kanban_data_cached(_conn_id):
-    """Returns dict: {status: [fund_dicts]} für Kanban-Board."""
+    """Returns dict: {status: [fund_dicts]} für Kanban-Board.
+    Ohne Kopie geteilt — Aufrufer dürfen das Ergebnis nicht verändern."""
     with get_connection() as conn:
         funds = get_funds_by_status_group(conn, 'pipeline')
 
-    result = {s: [] for s in PIPELINE_STATUSES}
+    by_status = defaultdict(list)
     for f in funds:
-        status = f['status']
-        if status in result:
-            result[status].append(f)
+        by_status[f['status']].append(f)
 
-    return result
+    return {s: by_status.get(s, []) for s in PIPELINE_STATUSES}
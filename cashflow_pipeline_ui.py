@@ -6,21 +6,38 @@ Kanban-Board, Tabelle, Neuer Fonds, Simulation.
 
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 from datetime import date
 
 from database import get_connection, clear_cache
 from cashflow_pipeline_db import (
-    VALID_TRANSITIONS, PIPELINE_STATUSES, STATUS_LABELS,
+    VALID_TRANSITIONS, PIPELINE_STATUSES, ALL_STATUSES, STATUS_LABELS,
     create_pipeline_fund, change_fund_status, promote_fund, decline_fund,
-    upsert_pipeline_meta, get_pipeline_meta, get_fund_status_history,
+    upsert_pipeline_meta,
 )
 from cashflow_pipeline_queries import (
     get_pipeline_summary_cached,
     get_pipeline_funds_cached,
+    get_pipeline_funds_filtered_cached,
     get_pipeline_kanban_data_cached,
     get_pipeline_history_cached,
 )
+from cashflow_queries import get_all_funds_for_cashflow_cached
+
+
+def _invalidate_pipeline_caches(funds_changed=True):
+    """Leert nur die Pipeline-Caches statt des gesamten App-Caches.
+
+    Portfolio-/J-Curve-Caches bleiben warm. funds_changed=True zusätzlich für
+    die Fondsliste (Status-Spalte / neuer Fonds), False bei reinen Meta-Edits.
+    Promote zu 'committed' ändert das aktive Portfolio → dort clear_cache().
+    """
+    get_pipeline_summary_cached.clear()
+    get_pipeline_funds_cached.clear()
+    get_pipeline_funds_filtered_cached.clear()
+    get_pipeline_kanban_data_cached.clear()
+    get_pipeline_history_cached.clear()
+    if funds_changed:
+        get_all_funds_for_cashflow_cached.clear()
 
 
 def render_pipeline_section(conn, conn_id):
@@ -44,9 +61,8 @@ def render_pipeline_section(conn, conn_id):
             st.metric("Avg DD-Score",
                        f"{summary['avg_dd_score']:.1f}" if summary['avg_dd_score'] else "–")
         with k4:
-            upcoming = summary['upcoming_next_steps']
-            if upcoming:
-                ns = upcoming[0]
+            ns = summary['next_deadline']
+            if ns:
                 st.metric("Nächste Deadline",
                           f"{ns['fund_name']}: {ns['next_step_date']}")
             else:
@@ -58,7 +74,7 @@ def render_pipeline_section(conn, conn_id):
     ])
 
     with tab_kanban:
-        _render_kanban(conn, conn_id)
+        _render_kanban(conn_id)
 
     with tab_table:
         _render_pipeline_table(conn, conn_id)
@@ -73,8 +89,32 @@ def render_pipeline_section(conn, conn_id):
         _render_history(conn_id)
 
 
-def _render_kanban(conn, conn_id):
-    """Kanban-Board: 3 Spalten für Screening, DD, Negotiation."""
+_KANBAN_COLUMNS = ['fund_name', 'gp_name', 'strategy', 'probability',
+                   'expected_commitment', 'next_step']
+
+_KANBAN_COLUMN_CONFIG = {
+    'fund_name': st.column_config.TextColumn("Fonds"),
+    'gp_name': st.column_config.TextColumn("GP"),
+    'strategy': st.column_config.TextColumn("Strategy"),
+    'probability': st.column_config.NumberColumn("Prob. %", format="%.0f"),
+    'expected_commitment': st.column_config.NumberColumn("Exp. Commit", format="localized"),
+    'next_step': st.column_config.TextColumn("Next"),
+}
+
+
+@st.fragment
+def _render_kanban(conn_id):
+    """Kanban-Board: 3 Spalten für Screening, DD, Negotiation.
+
+    Jede Spalte ist ein st.dataframe (clientseitig gerendert); Aktionen laufen
+    über eine gemeinsame Fonds-Auswahl darunter statt Buttons pro Karte.
+
+    Als Fragment: Auswahl und Buttons rerunnen nur das Board; Promote/Decline
+    laufen als st.dialog (modal, ohne Session-State-Flags).
+    Status-Änderungen lösen weiterhin einen vollen Rerun aus, damit KPIs und
+    Tabelle aktuell bleiben. Verbindungen werden pro Aktion aus dem Pool
+    geholt, da die conn des App-Laufs im Fragment-Rerun schon zurückgegeben ist.
+    """
     kanban_data = get_pipeline_kanban_data_cached(conn_id)
 
     col_screen, col_dd, col_neg = st.columns(3)
@@ -84,102 +124,114 @@ def _render_kanban(conn, conn_id):
                         (col_neg, 'negotiation')]:
         with col:
             st.markdown(f"**{STATUS_LABELS[status]}** ({len(kanban_data[status])})")
-            st.markdown("---")
+            if kanban_data[status]:
+                st.dataframe(
+                    pd.DataFrame(kanban_data[status], columns=_KANBAN_COLUMNS),
+                    hide_index=True, width='stretch',
+                    column_config=_KANBAN_COLUMN_CONFIG
+                )
 
-            for fund in kanban_data[status]:
-                _render_fund_card(conn, conn_id, fund, status)
+    # Aktionen für einen ausgewählten Fonds
+    fund_status = {
+        fund['fund_id']: (fund, status)
+        for status in PIPELINE_STATUSES
+        for fund in kanban_data[status]
+    }
+    if not fund_status:
+        return
+
+    st.markdown("---")
+    fund_id = st.selectbox(
+        "Fonds für Aktion",
+        options=list(fund_status),
+        format_func=lambda fid: (f"{fund_status[fid][0]['fund_name']} "
+                                 f"({STATUS_LABELS[fund_status[fid][1]]})"),
+        key="kanban_action_fund"
+    )
+    fund, status = fund_status[fund_id]
+    _render_fund_actions(fund, status)
 
 
-def _render_fund_card(conn, conn_id, fund, status):
-    """Einzelne Fund-Card im Kanban-Board."""
+def _render_fund_actions(fund, status):
+    """Advance/Promote/Decline für einen Fonds im Kanban-Board."""
     fund_id = fund['fund_id']
-    with st.container(border=True):
-        st.markdown(f"**{fund['fund_name']}**")
-        if fund.get('gp_name'):
-            st.caption(f"GP: {fund['gp_name']}")
-        if fund.get('strategy'):
-            st.caption(f"Strategy: {fund['strategy']}")
-
-        prob = fund.get('probability') or 0
-        exp_commit = fund.get('expected_commitment') or 0
-        st.caption(f"Prob: {prob:.0f}% | Exp. Commit: {exp_commit:,.0f}")
-
-        if fund.get('next_step'):
-            st.caption(f"Next: {fund['next_step']}")
-
-        # Action buttons
-        valid_next = VALID_TRANSITIONS.get(status, [])
-        promote_status = [s for s in valid_next if s != 'declined']
-
-        btn_col1, btn_col2 = st.columns(2)
-        with btn_col1:
-            if promote_status:
-                next_s = promote_status[0]
-                if next_s == 'committed':
-                    # Special promote flow
-                    if st.button("Promote", key=f"promote_{fund_id}",
-                                 type="primary", width='stretch'):
-                        st.session_state[f"show_promote_{fund_id}"] = True
-                else:
-                    if st.button(f"→ {STATUS_LABELS[next_s]}", key=f"advance_{fund_id}",
-                                 type="primary", width='stretch'):
-                        try:
-                            change_fund_status(conn, fund_id, next_s)
-                            clear_cache()
-                            st.rerun()
-                        except ValueError as e:
-                            st.error(str(e))
-
-        with btn_col2:
-            if 'declined' in valid_next:
-                if st.button("Decline", key=f"decline_{fund_id}",
-                             width='stretch'):
-                    st.session_state[f"show_decline_{fund_id}"] = True
-
-        # Promote dialog
-        if st.session_state.get(f"show_promote_{fund_id}"):
-            with st.form(f"promote_form_{fund_id}"):
-                st.markdown("**Commitment-Details für Promote:**")
-                commit_amt = st.number_input(
-                    "Commitment Amount", min_value=0.0,
-                    value=float(exp_commit), step=100000.0,
-                    key=f"promote_amt_{fund_id}"
-                )
-                commit_date = st.date_input(
-                    "Commitment Datum", value=date.today(),
-                    key=f"promote_date_{fund_id}"
-                )
-                if st.form_submit_button("Promote zu Committed"):
+
+    # Action buttons
+    valid_next = VALID_TRANSITIONS.get(status, frozenset())
+    promote_status = [s for s in ALL_STATUSES if s in valid_next and s != 'declined']
+
+    btn_col1, btn_col2 = st.columns(2)
+    with btn_col1:
+        if promote_status:
+            next_s = promote_status[0]
+            if next_s == 'committed':
+                # Special promote flow
+                if st.button("Promote", key=f"promote_{fund_id}",
+                             type="primary", width='stretch'):
+                    _promote_dialog(fund)
+            else:
+                if st.button(f"→ {STATUS_LABELS[next_s]}", key=f"advance_{fund_id}",
+                             type="primary", width='stretch'):
                     try:
-                        promote_fund(conn, fund_id, commit_amt, commit_date)
-                        clear_cache()
-                        st.session_state.pop(f"show_promote_{fund_id}", None)
-                        st.success(f"{fund['fund_name']} promoted!")
+                        with get_connection() as conn:
+                            change_fund_status(conn, fund_id, next_s)
+                        _invalidate_pipeline_caches()
                         st.rerun()
                     except ValueError as e:
                         st.error(str(e))
 
-        # Decline dialog
-        if st.session_state.get(f"show_decline_{fund_id}"):
-            with st.form(f"decline_form_{fund_id}"):
-                reason = st.text_area("Ablehnungsgrund", key=f"decline_reason_{fund_id}")
-                if st.form_submit_button("Ablehnen"):
-                    decline_fund(conn, fund_id, reason or 'Kein Grund angegeben')
-                    clear_cache()
-                    st.session_state.pop(f"show_decline_{fund_id}", None)
-                    st.success(f"{fund['fund_name']} abgelehnt.")
-                    st.rerun()
+    with btn_col2:
+        if 'declined' in valid_next:
+            if st.button("Decline", key=f"decline_{fund_id}",
+                         width='stretch'):
+                _decline_dialog(fund)
 
 
-def _render_pipeline_table(conn, conn_id):
-    """Sortierbare Tabelle aller Pipeline-Fonds."""
-    df = get_pipeline_funds_cached(conn_id)
+@st.dialog("Promote zu Committed")
+def _promote_dialog(fund):
+    """Modal: Commitment-Details erfassen und Fonds zu 'committed' promoten."""
+    fund_id = fund['fund_id']
+    exp_commit = fund.get('expected_commitment') or 0
+
+    st.markdown(f"**{fund['fund_name']}** — Commitment-Details für Promote:")
+    with st.form(f"promote_form_{fund_id}"):
+        commit_amt = st.number_input(
+            "Commitment Amount", min_value=0.0,
+            value=float(exp_commit), step=100000.0,
+            key=f"promote_amt_{fund_id}"
+        )
+        commit_date = st.date_input(
+            "Commitment Datum", value=date.today(),
+            key=f"promote_date_{fund_id}"
+        )
+        if st.form_submit_button("Promote zu Committed"):
+            try:
+                with get_connection() as conn:
+                    promote_fund(conn, fund_id, commit_amt, commit_date)
+                clear_cache()
+                st.rerun()
+            except ValueError as e:
+                st.error(str(e))
+
+
+@st.dialog("Fonds ablehnen")
+def _decline_dialog(fund):
+    """Modal: Ablehnungsgrund erfassen und Fonds ablehnen."""
+    fund_id = fund['fund_id']
+
+    st.markdown(f"**{fund['fund_name']}**")
+    with st.form(f"decline_form_{fund_id}"):
+        reason = st.text_area("Ablehnungsgrund", key=f"decline_reason_{fund_id}")
+        if st.form_submit_button("Ablehnen"):
+            with get_connection() as conn:
+                decline_fund(conn, fund_id, reason or 'Kein Grund angegeben')
+            _invalidate_pipeline_caches()
+            st.rerun()
 
-    if df.empty:
-        st.info("Keine Pipeline-Fonds vorhanden.")
-        return
 
-    # Status-Filter
+def _render_pipeline_table(conn, conn_id):
+    """Sortierbare Tabelle aller Pipeline-Fonds."""
+    # Status-Filter (wird im SQL angewendet; leer = alle Pipeline-Status)
     status_filter = st.multiselect(
         "Status-Filter",
         options=list(PIPELINE_STATUSES),
@@ -187,15 +239,18 @@ def _render_pipeline_table(conn, conn_id):
         default=list(PIPELINE_STATUSES),
         key="pipe_table_filter"
     )
-    if status_filter:
-        df = df[df['status'].isin(status_filter)]
+    statuses = tuple(sorted(status_filter or PIPELINE_STATUSES))
+    df = get_pipeline_funds_filtered_cached(conn_id, statuses)
 
     if df.empty:
-        st.info("Keine Fonds für die Filterauswahl.")
+        if len(statuses) < len(PIPELINE_STATUSES):
+            st.info("Keine Fonds für die Filterauswahl.")
+        else:
+            st.info("Keine Pipeline-Fonds vorhanden.")
         return
 
     # Display
-    display_cols = ['fund_name', 'status', 'gp_name', 'strategy', 'geography',
+    display_cols = ['fund_name', 'status_label', 'gp_name', 'strategy', 'geography',
                     'probability', 'expected_commitment', 'dd_score',
                     'next_step', 'next_step_date']
     available = [c for c in display_cols if c in df.columns]
@@ -203,7 +258,7 @@ def _render_pipeline_table(conn, conn_id):
 
     col_map = {
         'fund_name': 'Fonds',
-        'status': 'Status',
+        'status_label': 'Status',
         'gp_name': 'GP',
         'strategy': 'Strategie',
         'geography': 'Geographie',
@@ -214,8 +269,6 @@ def _render_pipeline_table(conn, conn_id):
         'next_step_date': 'Deadline',
     }
     display_df = display_df.rename(columns=col_map)
-    if 'Status' in display_df.columns:
-        display_df['Status'] = display_df['Status'].map(STATUS_LABELS).fillna(display_df['Status'])
 
     st.dataframe(display_df, hide_index=True, width='stretch')
 
@@ -261,7 +314,7 @@ def _render_pipeline_table(conn, conn_id):
                     next_step=new_next_step or None,
                     next_step_date=new_ns_date,
                 )
-                clear_cache()
+                _invalidate_pipeline_caches(funds_changed=False)
                 st.success("Gespeichert.")
                 st.rerun()
 
@@ -301,7 +354,7 @@ def _render_new_fund_form(conn, conn_id):
                     int(vintage), probability, expected_commitment or None,
                     source or None, contact or None
                 )
-                clear_cache()
+                _invalidate_pipeline_caches()
                 st.success(f"Pipeline-Fonds '{fund_name}' erstellt (ID: {fund_id}).")
                 st.rerun()
 
@@ -330,14 +383,14 @@ def _render_simulation(conn, conn_id):
 
     selected_df = df[df['fund_name'].isin(selected)]
 
-    # Summarize
-    total_exp = 0.0
-    total_weighted = 0.0
-    for _, row in selected_df.iterrows():
-        exp = row.get('expected_commitment') or 0
-        prob = (row.get('probability') or 0) / 100.0
-        total_exp += exp
-        total_weighted += exp * prob
+    # Summarize (vektorisiert; Arrays werden für den Chart wiederverwendet)
+    # na_value statt fillna spart je eine Series; prob wird in-place zu weighted
+    exp = selected_df['expected_commitment'].to_numpy(dtype=float, na_value=0.0)
+    weighted = selected_df['probability'].to_numpy(dtype=float, na_value=0.0, copy=True)
+    weighted /= 100.0
+    weighted *= exp
+    total_exp = float(exp.sum())
+    total_weighted = float(weighted.sum())
 
     s1, s2, s3 = st.columns(3)
     with s1:
@@ -347,56 +400,37 @@ def _render_simulation(conn, conn_id):
     with s3:
         st.metric("Prob.-Gewichtet", f"{total_weighted:,.0f}")
 
-    # Simple bar chart of expected commitments
+    # Simple bar chart of expected commitments (Vega-Lite, kein Matplotlib-PNG)
     if not selected_df.empty:
-        fig, ax = plt.subplots(figsize=(10, 4))
-        chart_df = selected_df[['fund_name', 'expected_commitment', 'probability']].copy()
-        chart_df['expected_commitment'] = chart_df['expected_commitment'].fillna(0)
-        chart_df['probability'] = chart_df['probability'].fillna(0)
-        chart_df['weighted'] = chart_df['expected_commitment'] * chart_df['probability'] / 100
-
-        x = range(len(chart_df))
-        ax.bar(x, chart_df['expected_commitment'], alpha=0.3, label='Expected Commitment',
-               color='steelblue')
-        ax.bar(x, chart_df['weighted'], alpha=0.8, label='Prob.-gewichtet',
-               color='steelblue')
-        ax.set_xticks(x)
-        ax.set_xticklabels(chart_df['fund_name'], rotation=45, ha='right')
-        ax.set_ylabel("Betrag")
-        ax.set_title("Pipeline: Expected vs. Gewichtetes Commitment")
-        ax.legend()
-        ax.grid(axis='y', alpha=0.3)
-        plt.tight_layout()
-        st.pyplot(fig)
-        plt.close(fig)
+        st.caption("Pipeline: Expected vs. Gewichtetes Commitment")
+        chart_df = pd.DataFrame({
+            'Expected Commitment': exp,
+            'Prob.-gewichtet': weighted,
+        }, index=selected_df['fund_name'].to_numpy(), copy=False)
+        st.bar_chart(chart_df, stack=False, y_label="Betrag")
 
 
 def _render_history(conn_id):
     """Status-Änderungshistorie."""
-    history = get_pipeline_history_cached(conn_id)
+    df = get_pipeline_history_cached(conn_id)
 
-    if not history:
+    if df.empty:
         st.info("Keine Status-Änderungen vorhanden.")
         return
 
-    df = pd.DataFrame(history)
-    display_cols = ['fund_name', 'old_status', 'new_status', 'changed_by',
+    display_cols = ['fund_name', 'old_status_label', 'new_status_label', 'changed_by',
                     'change_reason', 'changed_at']
     available = [c for c in display_cols if c in df.columns]
     display_df = df[available].copy()
 
     col_map = {
         'fund_name': 'Fonds',
-        'old_status': 'Von',
-        'new_status': 'Nach',
+        'old_status_label': 'Von',
+        'new_status_label': 'Nach',
         'changed_by': 'Geändert von',
         'change_reason': 'Grund',
         'changed_at': 'Zeitpunkt',
     }
     display_df = display_df.rename(columns=col_map)
 
-    for col in ['Von', 'Nach']:
-        if col in display_df.columns:
-            display_df[col] = display_df[col].map(STATUS_LABELS).fillna(display_df[col])
-
     st.dataframe(display_df, hide_index=True, width='stretch')
@@ -2,32 +2,66 @@
 Cashflow Planning Tool — Portfolio-Charts
 
 Charts für Portfolio-Aggregation, Fonds-Beiträge und Ist vs. Forecast.
+
+Balken-Charts (Portfolio-Cashflows, Fonds-Beiträge, Abweichungen) rendert die
+UI als Altair-Chart. Matplotlib bleibt für die J-Curve, Ist vs. Forecast und
+die Portfolio-Balken im PDF-Export (create_portfolio_bar_chart).
 """
 
-import matplotlib.pyplot as plt
+import altair as alt
 import matplotlib.dates as mdates
+from matplotlib.figure import Figure
 import numpy as np
 import pandas as pd
 
 
+def _new_figure(figsize):
+    """Figure direkt über die OO-API, ohne pyplot-Figure-Manager.
+
+    Spart die pyplot-Registrierung pro Chart und verhindert, dass gecachte,
+    nie geschlossene Figures im globalen pyplot-Zustand liegen bleiben.
+    """
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
+    return fig, ax
+
+
+def _insert_zero_crossings(x, y):
+    """Fügt linear interpolierte Nullstellen zwischen Vorzeichenwechseln ein.
+
+    x, y: float-Arrays gleicher Länge. Returns (x, y) inkl. der Stützpunkte
+    mit y=0, sodass np.clip-Flächen exakt an der Nulllinie enden.
+    """
+    if len(y) < 2:
+        return x, y
+    idx = np.flatnonzero(y[:-1] * y[1:] < 0)
+    if idx.size == 0:
+        return x, y
+    y0, y1 = y[idx], y[idx + 1]
+    x_cross = x[idx] - y0 * (x[idx + 1] - x[idx]) / (y1 - y0)
+    return np.insert(x, idx + 1, x_cross), np.insert(y, idx + 1, 0.0)
+
+
 def create_portfolio_j_curve_chart(cumulative_df, base_currency):
     """Aggregierte J-Curve über alle ausgewählten Fonds."""
     if cumulative_df.empty:
         return None
 
-    fig, ax = plt.subplots(figsize=(12, 6))
+    fig, ax = _new_figure((12, 6))
 
     dates = cumulative_df['date']
     cum_net = cumulative_df['cumulative_net_cashflow']
 
     ax.plot(dates, cum_net, color='#1a237e', linewidth=2, zorder=3)
 
-    ax.fill_between(dates, cum_net, 0,
-                    where=(cum_net >= 0), color='#4caf50', alpha=0.3,
-                    interpolate=True, label='Positiv')
-    ax.fill_between(dates, cum_net, 0,
-                    where=(cum_net < 0), color='#f44336', alpha=0.3,
-                    interpolate=True, label='Negativ')
+    # Nullstellen einmal einfügen, dann geclippte Flächen ohne where=/interpolate
+    x_fill, y_fill = _insert_zero_crossings(
+        mdates.date2num(dates), cum_net.to_numpy(dtype=float)
+    )
+    ax.fill_between(x_fill, np.clip(y_fill, 0, None), 0,
+                    color='#4caf50', alpha=0.3, label='Positiv')
+    ax.fill_between(x_fill, np.clip(y_fill, None, 0), 0,
+                    color='#f44336', alpha=0.3, label='Negativ')
 
     ax.axhline(y=0, color='gray', linestyle='--', linewidth=0.8)
     ax.set_title('Portfolio J-Curve (aggregiert)', fontsize=14, fontweight='bold')
@@ -35,10 +69,10 @@ def create_portfolio_j_curve_chart(cumulative_df, base_currency):
     ax.set_ylabel(f'Kumulierter Netto-Cashflow ({base_currency})')
     ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
     ax.xaxis.set_major_locator(mdates.AutoDateLocator())
-    plt.xticks(rotation=45)
+    ax.tick_params(axis='x', labelrotation=45)
     ax.grid(True, alpha=0.3)
     ax.legend(loc='best')
-    plt.tight_layout()
+    fig.tight_layout()
 
     return fig
 
@@ -48,7 +82,7 @@ def create_portfolio_bar_chart(periodic_df, base_currency):
     if periodic_df.empty:
         return None
 
-    fig, ax = plt.subplots(figsize=(14, 6))
+    fig, ax = _new_figure((14, 6))
 
     x = np.arange(len(periodic_df))
     width = 0.35
@@ -72,43 +106,7 @@ def create_portfolio_bar_chart(periodic_df, base_currency):
     ax.set_xticklabels(periodic_df['period_label'], rotation=45, ha='right')
     ax.grid(True, alpha=0.3, axis='y')
     ax.legend(loc='best')
-    plt.tight_layout()
-
-    return fig
-
-
-def create_portfolio_fund_contribution_chart(fund_breakdown_df, base_currency):
-    """Gestapeltes Balkendiagramm: Beitrag jedes Fonds zu Calls + Distributions."""
-    if fund_breakdown_df.empty:
-        return None
-
-    valid_df = fund_breakdown_df.dropna(subset=['called_base', 'distributed_base'])
-    if valid_df.empty:
-        return None
-
-    fig, ax = plt.subplots(figsize=(14, 6))
-
-    fund_names = valid_df['fund_name'].tolist()
-    x = np.arange(len(fund_names))
-    width = 0.35
-
-    calls = valid_df['called_base'].values
-    dists = valid_df['distributed_base'].values
-
-    ax.bar(x - width / 2, -calls, width, label='Kapitalabrufe',
-           color='#ef5350', alpha=0.85)
-    ax.bar(x + width / 2, dists, width, label='Ausschüttungen',
-           color='#66bb6a', alpha=0.85)
-
-    ax.axhline(y=0, color='gray', linestyle='-', linewidth=0.5)
-    ax.set_title(f'Fonds-Beiträge ({base_currency})', fontsize=14, fontweight='bold')
-    ax.set_xlabel('Fonds')
-    ax.set_ylabel(f'Betrag ({base_currency})')
-    ax.set_xticks(x)
-    ax.set_xticklabels(fund_names, rotation=45, ha='right')
-    ax.grid(True, alpha=0.3, axis='y')
-    ax.legend(loc='best')
-    plt.tight_layout()
+    fig.tight_layout()
 
     return fig
 
@@ -118,7 +116,7 @@ def create_actual_vs_forecast_chart(actual_df, forecast_df, title, currency):
     if actual_df.empty and forecast_df.empty:
         return None
 
-    fig, ax = plt.subplots(figsize=(12, 6))
+    fig, ax = _new_figure((12, 6))
     has_data = False
 
     if not actual_df.empty and 'cumulative_net_cashflow' in actual_df.columns:
@@ -133,18 +131,22 @@ def create_actual_vs_forecast_chart(actual_df, forecast_df, title, currency):
 
     # Abweichung schattieren wenn beide vorhanden
     if not actual_df.empty and not forecast_df.empty:
-        # Auf gemeinsame Daten mergen
-        merged = pd.merge(
-            actual_df[['date', 'cumulative_net_cashflow']].rename(columns={'cumulative_net_cashflow': 'actual'}),
-            forecast_df[['date', 'cumulative_net_cashflow']].rename(columns={'cumulative_net_cashflow': 'forecast'}),
-            on='date', how='inner'
-        )
+        # Forecast auf Ist-Daten ausrichten (nächster Forecast-Punkt, max. 31 Tage
+        # entfernt) statt nur exakt gleiche Daten per inner merge
+        merged = pd.merge_asof(
+            actual_df[['date', 'cumulative_net_cashflow']]
+            .rename(columns={'cumulative_net_cashflow': 'actual'})
+            .sort_values('date'),
+            forecast_df[['date', 'cumulative_net_cashflow']]
+            .rename(columns={'cumulative_net_cashflow': 'forecast'})
+            .sort_values('date'),
+            on='date', direction='nearest', tolerance=pd.Timedelta('31D')
+        ).dropna(subset=['forecast'])
         if not merged.empty:
             ax.fill_between(merged['date'], merged['actual'], merged['forecast'],
                             alpha=0.15, color='#ff9800', label='Abweichung')
 
     if not has_data:
-        plt.close(fig)
         return None
 
     ax.axhline(y=0, color='gray', linestyle='--', linewidth=0.8)
@@ -153,34 +155,104 @@ def create_actual_vs_forecast_chart(actual_df, forecast_df, title, currency):
     ax.set_ylabel(f'Kumulierter Netto-Cashflow ({currency})')
     ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
     ax.xaxis.set_major_locator(mdates.AutoDateLocator())
-    plt.xticks(rotation=45)
+    ax.tick_params(axis='x', labelrotation=45)
     ax.grid(True, alpha=0.3)
     ax.legend(loc='best')
-    plt.tight_layout()
+    fig.tight_layout()
 
     return fig
 
 
-def create_deviation_chart(deviation_df, title, currency):
-    """Balkendiagramm: periodische Abweichungen (grün=positiv, rot=negativ)."""
-    if deviation_df.empty or 'deviation' not in deviation_df.columns:
+# ============================================================================
+# ALTAIR-VARIANTEN (UI)
+# ============================================================================
+
+def _signed_bars_df(labels, calls, dists):
+    """Long-Format für Calls (negativ) vs. Distributions nebeneinander."""
+    return pd.DataFrame({
+        'label': labels,
+        'Kapitalabrufe': -np.abs(np.asarray(calls, dtype=float)),
+        'Ausschüttungen': np.asarray(dists, dtype=float),
+    }).melt(id_vars='label', var_name='Typ', value_name='Betrag')
+
+
+def _signed_bars(bars_df, x_title, base_currency):
+    return alt.Chart(bars_df).mark_bar(opacity=0.85).encode(
+        x=alt.X('label:N', title=x_title, sort=None),
+        xOffset='Typ:N',
+        y=alt.Y('Betrag:Q', title=f'Betrag ({base_currency})'),
+        color=alt.Color(
+            'Typ:N',
+            scale=alt.Scale(domain=['Kapitalabrufe', 'Ausschüttungen'],
+                            range=['#ef5350', '#66bb6a']),
+            legend=alt.Legend(title=None, orient='top'),
+        ),
+        tooltip=[alt.Tooltip('label:N', title=x_title), 'Typ:N',
+                 alt.Tooltip('Betrag:Q', format=',.0f')],
+    )
+
+
+def _zero_rule():
+    return alt.Chart(pd.DataFrame({'y': [0]})).mark_rule(color='gray').encode(y='y:Q')
+
+
+def create_portfolio_bar_altair_chart(periodic_df, base_currency):
+    """Altair-Variante von create_portfolio_bar_chart für st.altair_chart."""
+    if periodic_df.empty:
+        return None
+
+    bars = _signed_bars(
+        _signed_bars_df(periodic_df['period_label'], periodic_df['capital_calls'],
+                        periodic_df['distributions']),
+        'Periode', base_currency
+    )
+    net_line = alt.Chart(periodic_df).mark_line(
+        color='black', strokeWidth=2, point=True
+    ).encode(
+        x=alt.X('period_label:N', sort=None),
+        y='net_cashflow:Q',
+        tooltip=[alt.Tooltip('period_label:N', title='Periode'),
+                 alt.Tooltip('net_cashflow:Q', title='Netto-Cashflow', format=',.0f')],
+    )
+
+    return (bars + net_line + _zero_rule()).properties(
+        title='Portfolio Cashflows (aggregiert)', height=400
+    )
+
+
+def create_portfolio_fund_contribution_altair_chart(fund_breakdown_df, base_currency):
+    """Beitrag jedes Fonds zu Calls + Distributions als Balken für st.altair_chart."""
+    if fund_breakdown_df.empty:
         return None
 
-    fig, ax = plt.subplots(figsize=(14, 6))
+    valid_df = fund_breakdown_df.dropna(subset=['called_base', 'distributed_base'])
+    if valid_df.empty:
+        return None
 
-    x = np.arange(len(deviation_df))
-    deviations = deviation_df['deviation'].values
-    colors = ['#4caf50' if d >= 0 else '#f44336' for d in deviations]
+    bars = _signed_bars(
+        _signed_bars_df(valid_df['fund_name'], valid_df['called_base'],
+                        valid_df['distributed_base']),
+        'Fonds', base_currency
+    )
 
-    ax.bar(x, deviations, color=colors, alpha=0.85)
-    ax.axhline(y=0, color='gray', linestyle='-', linewidth=0.5)
+    return (bars + _zero_rule()).properties(
+        title=f'Fonds-Beiträge ({base_currency})', height=400
+    )
 
-    ax.set_title(title, fontsize=14, fontweight='bold')
-    ax.set_xlabel('Periode')
-    ax.set_ylabel(f'Abweichung ({currency})')
-    ax.set_xticks(x)
-    ax.set_xticklabels(deviation_df['period'].values, rotation=45, ha='right')
-    ax.grid(True, alpha=0.3, axis='y')
-    plt.tight_layout()
 
-    return fig
+def create_deviation_altair_chart(deviation_df, title, currency):
+    """Balkendiagramm der periodischen Abweichungen für st.altair_chart
+    (grün=positiv, rot=negativ)."""
+    if deviation_df.empty or 'deviation' not in deviation_df.columns:
+        return None
+
+    bars = alt.Chart(deviation_df).mark_bar(opacity=0.85).encode(
+        x=alt.X('period:N', title='Periode', sort=None),
+        y=alt.Y('deviation:Q', title=f'Abweichung ({currency})'),
+        color=alt.condition('datum.deviation >= 0',
+                            alt.value('#4caf50'), alt.value('#f44336')),
+        tooltip=[alt.Tooltip('period:N', title='Periode'),
+                 alt.Tooltip('deviation:Q', title='Abweichung', format=',.0f')],
+    )
+
+    return (bars + _zero_rule()).properties(title=title, height=400)
@@ -6,8 +6,6 @@ aggregierte Ist vs. Forecast Analyse.
 """
 
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 
 from cashflow_queries import (
     get_all_funds_for_cashflow_cached,
@@ -20,12 +18,13 @@ from cashflow_queries import (
 )
 from cashflow_portfolio_charts import (
     create_portfolio_j_curve_chart,
-    create_portfolio_bar_chart,
-    create_portfolio_fund_contribution_chart,
+    create_portfolio_bar_altair_chart,
+    create_portfolio_fund_contribution_altair_chart,
+    create_deviation_altair_chart,
     create_actual_vs_forecast_chart,
-    create_deviation_chart,
 )
 from cashflow_export import export_portfolio_excel, export_portfolio_report_pdf
+from cashflow_ui_helpers import amount_column_config, chart_png
 
 CURRENCY_OPTIONS = ['EUR', 'USD', 'CHF', 'GBP']
 
@@ -76,39 +75,39 @@ def render_portfolio_section(conn, conn_id):
         summary = get_portfolio_summary_cached(conn_id, fund_ids, base_currency, selected_scenario)
 
         # FX-Warnungen
-        if summary.get('fx_warnings'):
+        if summary.fx_warnings:
             st.warning(
-                f"⚠️ Fehlende FX-Raten für: {', '.join(summary['fx_warnings'])}. "
+                f"⚠️ Fehlende FX-Raten für: {', '.join(summary.fx_warnings)}. "
                 f"Beträge ohne Rate werden ignoriert."
             )
 
         # KPI-Zeile
         k1, k2, k3, k4 = st.columns(4)
         with k1:
-            st.metric("Total Commitment", f"{summary['total_commitment']:,.0f} {base_currency}")
+            st.metric("Total Commitment", f"{summary.total_commitment:,.0f} {base_currency}")
         with k2:
-            st.metric("Total Called", f"{summary['total_called']:,.0f} {base_currency}")
+            st.metric("Total Called", f"{summary.total_called:,.0f} {base_currency}")
         with k3:
-            st.metric("Total Distributed", f"{summary['total_distributed']:,.0f} {base_currency}")
+            st.metric("Total Distributed", f"{summary.total_distributed:,.0f} {base_currency}")
         with k4:
-            st.metric("Portfolio DPI", f"{summary['portfolio_dpi']:.2f}x")
+            st.metric("Portfolio DPI", f"{summary.portfolio_dpi:.2f}x")
 
         # --- Fonds-Aufschlüsselung ---
         breakdown_df = get_portfolio_fund_breakdown_cached(conn_id, fund_ids, base_currency, selected_scenario)
         if not breakdown_df.empty:
             st.markdown("**Fonds-Aufschlüsselung**")
-            display_bd = breakdown_df.copy()
-            for col in ['commitment_base', 'called_base', 'distributed_base', 'net_base']:
-                if col in display_bd.columns:
-                    display_bd[col] = display_bd[col].apply(
-                        lambda x: f"{x:,.0f}" if pd.notna(x) else "n/a"
-                    )
-            if 'dpi' in display_bd.columns:
-                display_bd['dpi'] = display_bd['dpi'].apply(lambda x: f"{x:.2f}x")
-            display_bd.columns = ['Fonds', 'Währung', f'Commitment ({base_currency})',
-                                  f'Called ({base_currency})', f'Distributed ({base_currency})',
-                                  f'Netto ({base_currency})', 'DPI']
-            st.dataframe(display_bd, hide_index=True, width='stretch')
+            # Numerisch lassen, Formatierung übernimmt column_config im Frontend
+            # set_axis statt copy() + columns: neue Spaltennamen ohne Datenkopie,
+            # breakdown_df bleibt für den Export unverändert
+            display_bd = breakdown_df.set_axis(
+                ['Fonds', 'Währung', f'Commitment ({base_currency})',
+                 f'Called ({base_currency})', f'Distributed ({base_currency})',
+                 f'Netto ({base_currency})', 'DPI'], axis=1
+            )
+            column_config = amount_column_config(display_bd.columns[2:6])
+            column_config['DPI'] = st.column_config.NumberColumn(format="%.2fx")
+            st.dataframe(display_bd, hide_index=True, width='stretch',
+                         column_config=column_config)
 
         # --- Export Buttons ---
         cumulative_df = get_portfolio_cumulative_cashflows_cached(
@@ -143,26 +142,21 @@ def render_portfolio_section(conn, conn_id):
 
         # --- Charts ---
         # (cumulative_df and periodic_df already loaded above)
-        cumulative_df = get_portfolio_cumulative_cashflows_cached(
-            conn_id, fund_ids, base_currency, selected_scenario
-        )
-        periodic_df = get_portfolio_periodic_cashflows_cached(
-            conn_id, fund_ids, base_currency, 'quarter', selected_scenario
-        )
 
-        chart_tab1, chart_tab2, chart_tab3 = st.tabs([
-            "Portfolio J-Curve", "Portfolio Balken", "Fonds-Beitrag"
-        ])
+        # Nur die gewählte Ansicht wird gerendert (statt aller st.tabs-Bodies)
+        pf_view = st.radio(
+            "Ansicht", options=["Portfolio J-Curve", "Portfolio Balken", "Fonds-Beitrag"],
+            horizontal=True, key="pf_active_tab", label_visibility="collapsed"
+        )
 
-        with chart_tab1:
-            fig = create_portfolio_j_curve_chart(cumulative_df, base_currency)
-            if fig:
-                st.pyplot(fig)
-                plt.close(fig)
+        if pf_view == "Portfolio J-Curve":
+            png = chart_png(create_portfolio_j_curve_chart, cumulative_df, base_currency)
+            if png:
+                st.image(png, width='stretch')
             else:
                 st.info("Keine Daten für Portfolio J-Curve.")
 
-        with chart_tab2:
+        elif pf_view == "Portfolio Balken":
             period = st.radio(
                 "Aggregation", options=['quarter', 'year'],
                 format_func=lambda x: 'Quartal' if x == 'quarter' else 'Jahr',
@@ -171,18 +165,16 @@ def render_portfolio_section(conn, conn_id):
             p_df = get_portfolio_periodic_cashflows_cached(
                 conn_id, fund_ids, base_currency, period, selected_scenario
             )
-            fig = create_portfolio_bar_chart(p_df, base_currency)
-            if fig:
-                st.pyplot(fig)
-                plt.close(fig)
+            chart = create_portfolio_bar_altair_chart(p_df, base_currency)
+            if chart is not None:
+                st.altair_chart(chart)
             else:
                 st.info("Keine Daten für Portfolio-Balkendiagramm.")
 
-        with chart_tab3:
-            fig = create_portfolio_fund_contribution_chart(breakdown_df, base_currency)
-            if fig:
-                st.pyplot(fig)
-                plt.close(fig)
+        else:
+            chart = create_portfolio_fund_contribution_altair_chart(breakdown_df, base_currency)
+            if chart is not None:
+                st.altair_chart(chart)
             else:
                 st.info("Keine Daten für Fonds-Beitrags-Chart.")
 
@@ -207,19 +199,17 @@ def render_portfolio_section(conn, conn_id):
             with m4:
                 st.metric("Ø Abweichung", f"{metrics['mean_deviation']:,.0f} {base_currency}")
 
-            fig = create_actual_vs_forecast_chart(
-                avf['actual_cumulative'], avf['forecast_cumulative'],
+            png = chart_png(
+                create_actual_vs_forecast_chart, avf['actual_cumulative'], avf['forecast_cumulative'],
                 'Portfolio: Ist vs. Forecast', base_currency
             )
-            if fig:
-                st.pyplot(fig)
-                plt.close(fig)
+            if png:
+                st.image(png, width='stretch')
 
             if not avf['periodic_deviation'].empty:
-                fig = create_deviation_chart(
+                chart = create_deviation_altair_chart(
                     avf['periodic_deviation'],
                     'Portfolio: Periodische Abweichung', base_currency
                 )
-                if fig:
-                    st.pyplot(fig)
-                    plt.close(fig)
+                if chart is not None:
+                    st.altair_chart(chart)
@@ -2,22 +2,94 @@
 Cashflow Planning Tool — Gecachte Queries für die UI
 
 Alle Funktionen nutzen @st.cache_data(ttl=300) mit _conn_id als
-Cache-Buster (Unterstrich = wird nicht gehasht).
+Cache-Buster (Unterstrich = wird nicht gehasht). max_entries begrenzt jeden
+Cache: 128 für Pro-Fonds-Queries, 32 für Portfolio-Queries (fund_ids-Tuple),
+8 für Queries ohne fachliche Parameter. cache_data liefert bei jedem Aufruf
+eine eigene Kopie — Ergebnisse dürfen ohne weiteres .copy() ergänzt werden.
+
+Die großen Multi-Fonds-Frames liegen in @st.cache_resource (kein Pickle/Kopie
+pro Treffer) und sind read-only; clear_cache() leert sie explizit.
 """
 
+from typing import NamedTuple
+
 import pandas as pd
 import numpy as np
 import streamlit as st
 from datetime import date, timedelta
 from database import get_connection
-from cashflow_db import get_cashflows_for_fund, get_all_scenarios, get_exchange_rate_with_inverse
+from cashflow_db import (
+    get_cashflows_for_fund, get_cashflows_for_funds, get_all_scenarios, get_all_exchange_rates,
+    get_exchange_rate_with_inverse, get_fx_rate_series, get_daily_cashflow_aggregates,
+    get_fund_daily_cashflow_aggregates, get_fund_daily_cashflow_aggregates_by_scenario
+)
 
 # Typ-Richtung für Vorzeichen in Berechnungen
-OUTFLOW_TYPES = {'capital_call', 'management_fee', 'carried_interest'}
-INFLOW_TYPES = {'distribution', 'clawback'}
-
-
-@st.cache_data(ttl=300)
+OUTFLOW_TYPES = frozenset({'capital_call', 'management_fee', 'carried_interest'})
+INFLOW_TYPES = frozenset({'distribution', 'clawback'})
+
+class CashflowSummary(NamedTuple):
+    """Summary-Metriken eines Fonds (Tuple statt dict: kleineres Pickle im Cache)."""
+    total_called: float
+    total_distributed: float
+    net_cashflow: float
+    dpi: float
+
+
+class PortfolioSummary(NamedTuple):
+    """Portfolio-Metriken in Basiswährung."""
+    total_commitment: float
+    total_called: float
+    total_distributed: float
+    total_unfunded: float
+    net_cashflow: float
+    portfolio_dpi: float
+    num_funds: int
+    fx_warnings: tuple
+
+
+# type wird beim Laden einmal in diesen Categorical-Typ gecastet (int8-Codes statt Strings)
+CASHFLOW_TYPE_DTYPE = pd.CategoricalDtype(
+    ['capital_call', 'management_fee', 'carried_interest', 'distribution', 'clawback']
+)
+_OUTFLOW_CODES = np.array(
+    [CASHFLOW_TYPE_DTYPE.categories.get_loc(t) for t in sorted(OUTFLOW_TYPES)], dtype=np.int8
+)
+
+
+def _period_keys(dates, period):
+    """Gruppierungsschlüssel je Periode: Quartal als Period, Jahr als int.
+    Beide int64-basiert und chronologisch sortiert; erst das kleine Ergebnis
+    wird zu Labels ('2024Q1' / '2024') gecastet."""
+    if period == 'quarter':
+        return dates.dt.to_period('Q')
+    return dates.dt.year
+
+
+def _add_signed_columns(df, amount_col='amount'):
+    """Setzt signed_amount (Outflows negativ) sowie capital_calls / distributions
+    als vorab gesplittete Spalten, damit groupby mit eingebautem 'sum' statt
+    Lambda pro Gruppe aggregieren kann. Verändert df in-place."""
+    amt = df[amount_col].to_numpy(dtype=float)
+    is_outflow = np.isin(df['type'].cat.codes.to_numpy(), _OUTFLOW_CODES)
+    signed = np.where(is_outflow, -amt, amt)
+    df['signed_amount'] = signed
+    df['capital_calls'] = np.where(signed < 0, signed, 0.0)
+    df['distributions'] = np.where(signed > 0, signed, 0.0)
+
+
+def _split_by_direction(df, amount_col='amount_base'):
+    """Betrag als zwei Arrays (Outflows, Inflows), jeweils 0.0 in der anderen
+    Richtung — Eingabe für ein einziges groupby.sum."""
+    amt = df[amount_col].to_numpy(dtype=float)
+    codes = df['type'].cat.codes.to_numpy()
+    is_outflow = np.isin(codes, _OUTFLOW_CODES)
+    # Code -1 = unbekannter Typ → weder Outflow noch Inflow
+    is_inflow = (codes >= 0) & ~is_outflow
+    return np.where(is_outflow, amt, 0.0), np.where(is_inflow, amt, 0.0)
+
+
+@st.cache_data(ttl=300, max_entries=128)
 def get_cashflows_for_fund_cached(_conn_id, fund_id, scenario_name=None):
     """Holt Cashflows als DataFrame"""
     with get_connection() as conn:
@@ -26,42 +98,59 @@ def get_cashflows_for_fund_cached(_conn_id, fund_id, scenario_name=None):
         return pd.DataFrame()
     df = pd.DataFrame(rows)
     df['date'] = pd.to_datetime(df['date'])
+    df['type'] = df['type'].astype(CASHFLOW_TYPE_DTYPE)
+    # bool statt object (NULL = Spalten-Default TRUE) → Masken/Reduktionen im C-Pfad
+    df['is_actual'] = df['is_actual'].fillna(True).astype(bool)
     return df
 
 
-@st.cache_data(ttl=300)
+@st.cache_data(ttl=300, max_entries=128)
+def get_fund_daily_cashflows_cached(_conn_id, fund_id, scenario_name='base'):
+    """Gemeinsame Zwischenstufe für J-Curve und Balken eines Fonds: die DB
+    summiert pro Datum, statt alle Einzel-Cashflows zu übertragen.
+
+    Returns DataFrame: date, capital_calls (negativ), distributions (positiv), is_actual
+    """
+    with get_connection() as conn:
+        rows = get_fund_daily_cashflow_aggregates(
+            conn, fund_id, sorted(OUTFLOW_TYPES), scenario_name
+        )
+    if not rows:
+        return pd.DataFrame()
+
+    agg = pd.DataFrame(rows)
+    return pd.DataFrame({
+        'date': pd.to_datetime(agg['date']),
+        'capital_calls': 0.0 - agg['calls'].to_numpy(dtype=float),
+        'distributions': agg['dists'].to_numpy(dtype=float),
+        'is_actual': agg['is_actual'].to_numpy(dtype=bool),
+    })
+
+
+@st.cache_data(ttl=300, max_entries=128)
 def get_cumulative_cashflows_cached(_conn_id, fund_id, scenario_name='base'):
     """Berechnet kumulative Cashflows für J-Curve.
 
     Returns DataFrame mit: date, capital_calls, distributions, net_cashflow,
-                           cumulative_net_cashflow, is_actual
+                           cumulative_net_cashflow, cum_calls (negativ), cum_dists, is_actual
     """
-    df = get_cashflows_for_fund_cached(_conn_id, fund_id, scenario_name)
-    if df.empty:
+    daily = get_fund_daily_cashflows_cached(_conn_id, fund_id, scenario_name)
+    if daily.empty:
         return pd.DataFrame()
 
-    # Signed amounts berechnen
-    df = df.copy()
-    df['signed_amount'] = df.apply(
-        lambda r: -r['amount'] if r['type'] in OUTFLOW_TYPES else r['amount'],
-        axis=1
-    )
-
-    # Pro Datum aggregieren
-    grouped = df.groupby('date').agg(
-        capital_calls=('signed_amount', lambda x: x[x < 0].sum()),
-        distributions=('signed_amount', lambda x: x[x > 0].sum()),
-        is_actual=('is_actual', 'all'),
-    ).reset_index()
-
+    # Bereits pro Datum aggregiert und sortiert → nur noch Netto + kumulieren
+    # (daily ist als cache_data-Ergebnis eine eigene Kopie)
+    grouped = daily
     grouped['net_cashflow'] = grouped['capital_calls'] + grouped['distributions']
-    grouped = grouped.sort_values('date').reset_index(drop=True)
-    grouped['cumulative_net_cashflow'] = grouped['net_cashflow'].cumsum()
+    grouped['cumulative_net_cashflow'] = np.cumsum(grouped['net_cashflow'].to_numpy())
+    # Getrennte Laufsummen für Timeline/Vergleich, einmal hier statt pro Chart-Render
+    grouped['cum_calls'] = np.cumsum(grouped['capital_calls'].to_numpy())
+    grouped['cum_dists'] = np.cumsum(grouped['distributions'].to_numpy())
 
     return grouped
 
 
-@st.cache_data(ttl=300)
+@st.cache_data(ttl=300, max_entries=128)
 def get_periodic_cashflows_cached(_conn_id, fund_id, period='quarter',
                                   scenario_name='base'):
     """Aggregiert Cashflows pro Quartal oder Jahr für Balkendiagramm.
@@ -69,33 +158,71 @@ def get_periodic_cashflows_cached(_conn_id, fund_id, period='quarter',
     Returns DataFrame mit: period_label, capital_calls (negativ), distributions (positiv),
                            net_cashflow
     """
-    df = get_cashflows_for_fund_cached(_conn_id, fund_id, scenario_name)
-    if df.empty:
+    daily = get_fund_daily_cashflows_cached(_conn_id, fund_id, scenario_name)
+    if daily.empty:
         return pd.DataFrame()
 
-    df = df.copy()
-    df['signed_amount'] = df.apply(
-        lambda r: -r['amount'] if r['type'] in OUTFLOW_TYPES else r['amount'],
-        axis=1
-    )
-
-    if period == 'quarter':
-        df['period_label'] = df['date'].dt.to_period('Q').astype(str)
-    else:
-        df['period_label'] = df['date'].dt.year.astype(str)
-
-    grouped = df.groupby('period_label').agg(
-        capital_calls=('signed_amount', lambda x: x[x < 0].sum()),
-        distributions=('signed_amount', lambda x: x[x > 0].sum()),
-    ).reset_index()
+    # Aus der Tagesaggregation (klein) statt aus allen Einzel-Cashflows
+    grouped = daily.groupby(_period_keys(daily['date'], period))[
+        ['capital_calls', 'distributions']
+    ].sum()
+    grouped = grouped.rename_axis('period_label').reset_index()
+    grouped['period_label'] = grouped['period_label'].astype(str)
 
     grouped['net_cashflow'] = grouped['capital_calls'] + grouped['distributions']
-    grouped = grouped.sort_values('period_label').reset_index(drop=True)
 
     return grouped
 
 
-@st.cache_data(ttl=300)
+@st.cache_data(ttl=300, max_entries=32)
+def get_scenario_comparison_data_cached(_conn_id, fund_id, scenario_names):
+    """Kumulative Cashflows + Summary für mehrere Szenarien eines Fonds aus einem
+    SQL-Aggregat (statt je Szenario eigener Queries). scenario_names: Tuple.
+
+    Returns dict: {scenario_name: {'cumulative': DataFrame wie
+                   get_cumulative_cashflows_cached, 'summary': CashflowSummary}}
+    """
+    with get_connection() as conn:
+        rows = get_fund_daily_cashflow_aggregates_by_scenario(
+            conn, fund_id, sorted(OUTFLOW_TYPES), scenario_names
+        )
+
+    result = {sc: {'cumulative': pd.DataFrame(), 'summary': CashflowSummary(0.0, 0.0, 0.0, 0.0)}
+              for sc in scenario_names}
+    if not rows:
+        return result
+
+    agg = pd.DataFrame(rows)
+    daily = pd.DataFrame({
+        'date': pd.to_datetime(agg['date']),
+        'capital_calls': 0.0 - agg['calls'].to_numpy(dtype=float),
+        'distributions': agg['dists'].to_numpy(dtype=float),
+        'is_actual': agg['is_actual'].to_numpy(dtype=bool),
+    })
+    daily['net_cashflow'] = daily['capital_calls'] + daily['distributions']
+    # Ein kumulatives Netto über alle Szenarien, je Szenario neu gestartet
+    scenario = agg['scenario_name']
+    cum = daily.groupby(scenario)[['net_cashflow', 'capital_calls', 'distributions']].cumsum()
+    daily['cumulative_net_cashflow'] = cum['net_cashflow']
+    daily['cum_calls'] = cum['capital_calls']
+    daily['cum_dists'] = cum['distributions']
+
+    for sc, cum_df in daily.groupby(scenario, sort=False):
+        total_called = -cum_df['capital_calls'].sum()
+        total_distributed = cum_df['distributions'].sum()
+        result[sc] = {
+            'cumulative': cum_df.reset_index(drop=True),
+            'summary': CashflowSummary(
+                total_called=float(total_called),
+                total_distributed=float(total_distributed),
+                net_cashflow=float(total_distributed - total_called),
+                dpi=float(total_distributed / total_called) if total_called > 0 else 0.0,
+            ),
+        }
+    return result
+
+
+@st.cache_data(ttl=300, max_entries=128)
 def get_fund_commitment_info_cached(_conn_id, fund_id):
     """Holt Commitment-Infos für einen Fonds"""
     with get_connection() as conn:
@@ -112,32 +239,75 @@ def get_fund_commitment_info_cached(_conn_id, fund_id):
             return dict(zip(columns, row))
 
 
-@st.cache_data(ttl=300)
+@st.cache_data(ttl=300, max_entries=32)
+def get_funds_info_bulk_cached(_conn_id, fund_ids):
+    """Commitment-Infos für mehrere Fonds in einem Query (fund_ids: Tuple).
+
+    Returns DataFrame: fund_id, fund_name, currency, commitment_amount,
+                       unfunded_amount, commitment_date, expected_end_date
+    """
+    if not fund_ids:
+        return pd.DataFrame()
+    query = """
+    SELECT fund_id, fund_name, currency, commitment_amount, unfunded_amount,
+           commitment_date, expected_end_date
+    FROM funds WHERE fund_id = ANY(%s)
+    ORDER BY fund_id
+    """
+    with get_connection() as conn:
+        return pd.read_sql_query(query, conn, params=(list(fund_ids),))
+
+
+@st.cache_data(ttl=300, max_entries=128)
 def get_cashflow_summary_cached(_conn_id, fund_id, scenario_name='base'):
     """Berechnet Summary-Metriken: total_called, total_distributed, net_cashflow, dpi"""
     df = get_cashflows_for_fund_cached(_conn_id, fund_id, scenario_name)
     if df.empty:
-        return {
-            'total_called': 0.0,
-            'total_distributed': 0.0,
-            'net_cashflow': 0.0,
-            'dpi': 0.0,
-        }
+        return CashflowSummary(0.0, 0.0, 0.0, 0.0)
 
-    total_called = df.loc[df['type'].isin(OUTFLOW_TYPES), 'amount'].sum()
-    total_distributed = df.loc[df['type'].isin(INFLOW_TYPES), 'amount'].sum()
+    out_amt, in_amt = _split_by_direction(df, 'amount')
+    total_called = out_amt.sum()
+    total_distributed = in_amt.sum()
     net = total_distributed - total_called
     dpi = total_distributed / total_called if total_called > 0 else 0.0
 
-    return {
-        'total_called': total_called,
-        'total_distributed': total_distributed,
-        'net_cashflow': net,
-        'dpi': dpi,
-    }
+    return CashflowSummary(
+        total_called=float(total_called),
+        total_distributed=float(total_distributed),
+        net_cashflow=float(net),
+        dpi=float(dpi),
+    )
+
 
+@st.cache_data(ttl=300, max_entries=64)
+def get_cashflow_summaries_batch_cached(_conn_id, fund_ids, scenario_name='base'):
+    """Called/Distributed je Fonds in Fondswährung (ohne FX) — ein SQL-Aggregat
+    für alle fund_ids statt get_cashflow_summary_cached pro Fonds.
 
-@st.cache_data(ttl=300)
+    Returns DataFrame: fund_id, fund_name, currency, commitment_amount,
+                       unfunded_amount, total_called, total_distributed
+    """
+    if not fund_ids:
+        return pd.DataFrame()
+
+    query = """
+    SELECT f.fund_id, f.fund_name, f.currency,
+           COALESCE(f.commitment_amount, 0) AS commitment_amount,
+           COALESCE(f.unfunded_amount, 0) AS unfunded_amount,
+           COALESCE(SUM(c.amount) FILTER (WHERE c.type = ANY(%s)), 0) AS total_called,
+           COALESCE(SUM(c.amount) FILTER (WHERE c.type = ANY(%s)), 0) AS total_distributed
+    FROM funds f
+    LEFT JOIN cashflows c ON c.fund_id = f.fund_id AND c.scenario_name = %s
+    WHERE f.fund_id = ANY(%s)
+    GROUP BY f.fund_id, f.fund_name, f.currency, f.commitment_amount, f.unfunded_amount
+    """
+    with get_connection() as conn:
+        return pd.read_sql_query(query, conn, params=(
+            sorted(OUTFLOW_TYPES), sorted(INFLOW_TYPES), scenario_name, list(fund_ids)
+        ))
+
+
+@st.cache_data(ttl=300, max_entries=128)
 def get_historical_pacing_cached(_conn_id, fund_id, scenario_name='base'):
     """Berechnet normalisierte Pacing-Kurven aus Ist-Daten.
 
@@ -150,7 +320,7 @@ def get_historical_pacing_cached(_conn_id, fund_id, scenario_name='base'):
         return {'call_pacing': {}, 'dist_pacing': {}, 'commitment': 0, 'first_year': None}
 
     # Nur Ist-Daten
-    actual_df = df[df['is_actual'] == True].copy()
+    actual_df = df[df['is_actual'] == True]
     if actual_df.empty:
         return {'call_pacing': {}, 'dist_pacing': {}, 'commitment': 0, 'first_year': None}
 
@@ -160,15 +330,19 @@ def get_historical_pacing_cached(_conn_id, fund_id, scenario_name='base'):
     if commitment <= 0:
         return {'call_pacing': {}, 'dist_pacing': {}, 'commitment': 0, 'first_year': None}
 
-    first_year = actual_df['date'].dt.year.min()
-    actual_df['year_offset'] = actual_df['date'].dt.year - first_year
+    years = actual_df['date'].dt.year
+    first_year = years.min()
+
+    # Richtungsmasken einmal berechnen, dann ein groupby.sum über beide Spalten
+    out_amt, in_amt = _split_by_direction(actual_df, 'amount')
+    per_year = pd.DataFrame(
+        {'calls': out_amt, 'dists': in_amt}, index=actual_df.index
+    ).groupby((years - first_year).rename('year_offset')).sum()
 
     call_pacing = {}
     dist_pacing = {}
 
-    for year_offset, group in actual_df.groupby('year_offset'):
-        calls = group.loc[group['type'].isin(OUTFLOW_TYPES), 'amount'].sum()
-        dists = group.loc[group['type'].isin(INFLOW_TYPES), 'amount'].sum()
+    for year_offset, calls, dists in per_year.itertuples(name=None):
         if calls > 0:
             call_pacing[int(year_offset)] = round(calls / commitment, 4)
         if dists > 0:
@@ -182,14 +356,14 @@ def get_historical_pacing_cached(_conn_id, fund_id, scenario_name='base'):
     }
 
 
-@st.cache_data(ttl=300)
+@st.cache_data(ttl=300, max_entries=8)
 def get_scenarios_cached(_conn_id):
     """Holt alle Szenarien als list[dict]"""
     with get_connection() as conn:
         return get_all_scenarios(conn)
 
 
-@st.cache_data(ttl=300)
+@st.cache_data(ttl=300, max_entries=8)
 def get_all_funds_for_cashflow_cached(_conn_id, include_pipeline=False):
     """Holt alle Fonds mit Cashflow-relevanten Feldern.
     include_pipeline=False: nur committed/active/harvesting/closed (Default).
@@ -216,17 +390,58 @@ def get_all_funds_for_cashflow_cached(_conn_id, include_pipeline=False):
             return pd.read_sql_query(query, conn)
 
 
+@st.cache_data(ttl=300, max_entries=8)
+def get_fund_name_to_id_cached(_conn_id):
+    """Mapping fund_name → fund_id (für O(1)-Lookups in Selectboxen)"""
+    df = get_all_funds_for_cashflow_cached(_conn_id)
+    if df.empty:
+        return {}
+    return dict(zip(df['fund_name'], df['fund_id'].astype(int).tolist()))
+
+
 # ============================================================================
 # FX-KONVERSION
 # ============================================================================
 
-@st.cache_data(ttl=300)
+@st.cache_data(ttl=300, max_entries=8)
+def get_exchange_rates_cached(_conn_id):
+    """Holt alle Wechselkurse als Anzeige-DataFrame.
+
+    Returns DataFrame mit: rate_id, Von, Nach, Datum (YYYY-MM-DD), Rate
+    """
+    with get_connection() as conn:
+        rates = get_all_exchange_rates(conn)
+    if not rates:
+        return pd.DataFrame()
+    df = pd.DataFrame(rates)
+    df = df.rename(columns={
+        'from_currency': 'Von', 'to_currency': 'Nach',
+        'rate_date': 'Datum', 'rate': 'Rate',
+    })
+    df['Datum'] = pd.to_datetime(df['Datum']).dt.strftime('%Y-%m-%d')
+    return df[['rate_id', 'Von', 'Nach', 'Datum', 'Rate']]
+
+
+@st.cache_data(ttl=300, max_entries=8)
+def get_exchange_rate_delete_options_cached(_conn_id):
+    """Mapping Anzeige-Label → rate_id für die Lösch-Auswahl"""
+    df = get_exchange_rates_cached(_conn_id)
+    if df.empty:
+        return {}
+    labels = [
+        f"{von}/{nach} {datum} ({rate:.4f})"
+        for von, nach, datum, rate in zip(df['Von'], df['Nach'], df['Datum'], df['Rate'])
+    ]
+    return dict(zip(labels, df['rate_id'].astype(int).tolist()))
+
+
+@st.cache_data(ttl=300, max_entries=128)
 def get_cashflows_in_base_currency_cached(_conn_id, fund_id, base_currency, scenario_name=None):
     """Holt Cashflows für einen Fonds, konvertiert in Basiswährung.
 
     Adds columns: original_currency, original_amount, fx_rate, amount_base.
     Wenn gleiche Währung → fx_rate=1.0.
-    Wenn kein Rate gefunden → fx_rate=None, amount_base=None (Warning-Flag).
+    Wenn kein Rate gefunden → fx_rate=NaN, amount_base=NaN (Warning-Flag).
     """
     df = get_cashflows_for_fund_cached(_conn_id, fund_id, scenario_name)
     if df.empty:
@@ -236,284 +451,379 @@ def get_cashflows_in_base_currency_cached(_conn_id, fund_id, base_currency, scen
     commit_info = get_fund_commitment_info_cached(_conn_id, fund_id)
     fund_currency = commit_info.get('currency') or 'EUR'
 
-    df = df.copy()
     df['original_currency'] = fund_currency
     df['original_amount'] = df['amount']
-
-    if fund_currency == base_currency:
-        df['fx_rate'] = 1.0
-        df['amount_base'] = df['amount']
-    else:
-        with get_connection() as conn:
-            fx_rates = []
-            for _, row in df.iterrows():
-                rate_date = row['date'].date() if hasattr(row['date'], 'date') else row['date']
-                rate = get_exchange_rate_with_inverse(conn, fund_currency, base_currency, rate_date)
-                fx_rates.append(rate)
-            df['fx_rate'] = fx_rates
-            df['amount_base'] = df.apply(
-                lambda r: r['amount'] * r['fx_rate'] if r['fx_rate'] is not None else None,
-                axis=1
-            )
+    _add_base_currency_columns(df, base_currency)
 
     return df
 
 
-@st.cache_data(ttl=300)
+def _add_base_currency_columns(df, base_currency):
+    """Setzt fx_rate / amount_base anhand von original_currency (in-place)."""
+    if (df['original_currency'] == base_currency).all():
+        # Häufigster Fall: nur Basiswährung → kein FX-Pfad, keine Verbindung
+        df['fx_rate'] = 1.0
+        df['amount_base'] = df['amount'].astype(float)
+        return
+    fx = _fx_rates_to_base(df, base_currency)
+    df['fx_rate'] = fx
+    df['amount_base'] = df['amount'].to_numpy(dtype=float) * fx
+
+
+def _fx_rates_to_base(df, base_currency):
+    """Kurs je Zeile (date, original_currency) → base_currency als float-Array.
+    Ein FX-Query für alle Fremdwährungen, dann ein as-of-Join je Richtung."""
+    fx = np.ones(len(df))
+    foreign_mask = (df['original_currency'] != base_currency).to_numpy()
+    if foreign_mask.any():
+        foreign = df.loc[foreign_mask, ['date', 'original_currency']]
+        currencies = sorted(foreign['original_currency'].unique())
+        with get_connection() as conn:
+            rate_rows = get_fx_rate_series(
+                conn, currencies, base_currency,
+                foreign['date'].min().date(), foreign['date'].max().date()
+            )
+        fx[foreign_mask] = _asof_fx_rates(foreign, rate_rows, currencies)
+    return fx
+
+
+def _asof_fx_rates(targets, rate_rows, currencies):
+    """Kurs je (date, original_currency) wie get_exchange_rate_with_inverse:
+    letzter Kurs am/vor dem Datum, direkte Rate vor inverser.
+    Returns float-Array in der Reihenfolge von targets (NaN = kein Kurs)."""
+    fx = np.full(len(targets), np.nan)
+    if not rate_rows:
+        return fx
+
+    # Gemeinsamer Categorical-Typ, damit merge_asof(by=...) auf Codes matcht
+    ccy_dtype = pd.CategoricalDtype(currencies)
+    target = pd.DataFrame({
+        'date': targets['date'].to_numpy(dtype='datetime64[ns]'),
+        'currency': pd.Categorical(targets['original_currency'], dtype=ccy_dtype),
+        'pos': np.arange(len(targets)),
+    }).sort_values('date', kind='stable')
+    rates = pd.DataFrame(rate_rows)
+    rates['date'] = pd.to_datetime(rates['rate_date']).astype('datetime64[ns]')
+    rates['currency'] = pd.Categorical(rates['currency'], dtype=ccy_dtype)
+    rates['rate'] = rates['rate'].astype(float)
+    rates = rates.sort_values('date', kind='stable')
+
+    # Inverse zuerst, direkte Kurse überschreiben sie
+    for direct in (False, True):
+        sub = rates.loc[rates['direct'] == direct, ['date', 'currency', 'rate']]
+        if sub.empty:
+            continue
+        if not direct:
+            sub = sub.assign(rate=1.0 / sub['rate'].where(sub['rate'] != 0))
+        matched = pd.merge_asof(target, sub, on='date', by='currency',
+                                direction='backward')
+        vals = matched['rate'].to_numpy()
+        found = ~np.isnan(vals)
+        fx[matched['pos'].to_numpy()[found]] = vals[found]
+
+    return fx
+
+
+@st.cache_resource(ttl=300, max_entries=32)
 def get_cashflows_multi_fund_base_currency_cached(_conn_id, fund_ids, base_currency, scenario_name='base'):
-    """Holt Cashflows für MEHRERE Fonds, alle in Basiswährung konvertiert."""
+    """Holt Cashflows für MEHRERE Fonds, alle in Basiswährung konvertiert.
+    Ein Query für alle Cashflows, ein Query für die Fonds-Infos.
+    cache_resource: ohne Kopie geteilt — Aufrufer dürfen das Ergebnis nicht verändern."""
     if not fund_ids:
         return pd.DataFrame()
 
-    all_dfs = []
-    for fid in fund_ids:
-        df = get_cashflows_in_base_currency_cached(_conn_id, fid, base_currency, scenario_name)
-        if not df.empty:
-            commit_info = get_fund_commitment_info_cached(_conn_id, fid)
-            df = df.copy()
-            df['fund_name'] = commit_info.get('fund_name', f'Fund {fid}')
-            all_dfs.append(df)
-
-    if not all_dfs:
+    with get_connection() as conn:
+        rows = get_cashflows_for_funds(conn, fund_ids, scenario_name)
+    if not rows:
         return pd.DataFrame()
 
-    return pd.concat(all_dfs, ignore_index=True)
+    infos = get_funds_info_bulk_cached(_conn_id, fund_ids).set_index('fund_id')
+    df = pd.DataFrame(rows)
+    df['date'] = pd.to_datetime(df['date'])
+    df['type'] = df['type'].astype(CASHFLOW_TYPE_DTYPE)
+    df['is_actual'] = df['is_actual'].fillna(True).astype(bool)
+    df['original_currency'] = df['fund_id'].map(infos['currency']).fillna('EUR')
+    df['original_amount'] = df['amount']
+    _add_base_currency_columns(df, base_currency)
+    df['fund_name'] = df['fund_id'].map(infos['fund_name']).fillna(
+        'Fund ' + df['fund_id'].astype(str)
+    )
+    return df
 
 
 # ============================================================================
 # PORTFOLIO-AGGREGATION
 # ============================================================================
 
-@st.cache_data(ttl=300)
-def get_portfolio_cumulative_cashflows_cached(_conn_id, fund_ids, base_currency, scenario_name='base'):
-    """Aggregiert kumulative Cashflows über ausgewählte Fonds in Basiswährung."""
-    multi_df = get_cashflows_multi_fund_base_currency_cached(
-        _conn_id, fund_ids, base_currency, scenario_name
-    )
-    if multi_df.empty or 'amount_base' not in multi_df.columns:
+@st.cache_data(ttl=300, max_entries=32)
+def get_portfolio_daily_cashflows_cached(_conn_id, fund_ids, base_currency, scenario_name='base',
+                                         planned_only=False):
+    """Gemeinsame Zwischenstufe für Portfolio-J-Curve und -Balken, aggregiert
+    pro Datum in Basiswährung.
+
+    Die DB summiert bereits pro (Datum, Fondswährung); hier wird nur noch diese
+    kleine Tabelle FX-konvertiert (Kurs je Datum → identisch zur Einzelkonversion).
+    Returns DataFrame: date, capital_calls (negativ), distributions (positiv)
+    """
+    if not fund_ids:
         return pd.DataFrame()
 
-    # Nur Zeilen mit gültiger Konversion
-    valid_df = multi_df.dropna(subset=['amount_base']).copy()
-    if valid_df.empty:
+    with get_connection() as conn:
+        rows = get_daily_cashflow_aggregates(
+            conn, fund_ids, sorted(OUTFLOW_TYPES), scenario_name, planned_only
+        )
+    if not rows:
         return pd.DataFrame()
 
-    valid_df['signed_amount'] = valid_df.apply(
-        lambda r: -r['amount_base'] if r['type'] in OUTFLOW_TYPES else r['amount_base'],
-        axis=1
-    )
+    agg = pd.DataFrame(rows)
+    agg['date'] = pd.to_datetime(agg['date'])
+    agg['original_currency'] = agg['currency']
+    fx = _fx_rates_to_base(agg, base_currency)
 
-    grouped = valid_df.groupby('date').agg(
-        capital_calls=('signed_amount', lambda x: x[x < 0].sum()),
-        distributions=('signed_amount', lambda x: x[x > 0].sum()),
-    ).reset_index()
+    # Nur Zeilen mit gültiger Konversion
+    valid = ~np.isnan(fx)
+    if not valid.any():
+        return pd.DataFrame()
+    calls = 0.0 - agg['calls'].to_numpy(dtype=float)[valid] * fx[valid]
+    dists = agg['dists'].to_numpy(dtype=float)[valid] * fx[valid]
+
+    # Summe pro Datum (über Währungen) via np.add.reduceat über sortierte Datums-Blöcke
+    dates = agg['date'].to_numpy()[valid]
+    order = np.argsort(dates, kind='stable')
+    dates = dates[order]
+    starts = np.r_[0, np.flatnonzero(dates[1:] != dates[:-1]) + 1]
+    return pd.DataFrame({
+        'date': dates[starts],
+        'capital_calls': np.add.reduceat(calls[order], starts),
+        'distributions': np.add.reduceat(dists[order], starts),
+    })
+
+
+@st.cache_resource(ttl=300, max_entries=32)
+def get_portfolio_cumulative_cashflows_cached(_conn_id, fund_ids, base_currency, scenario_name='base'):
+    """Aggregiert kumulative Cashflows über ausgewählte Fonds in Basiswährung.
+    cache_resource: ohne Kopie geteilt — Aufrufer dürfen das Ergebnis nicht verändern."""
+    daily = get_portfolio_daily_cashflows_cached(_conn_id, fund_ids, base_currency, scenario_name)
+    if daily.empty:
+        return pd.DataFrame()
 
-    grouped['net_cashflow'] = grouped['capital_calls'] + grouped['distributions']
-    grouped = grouped.sort_values('date').reset_index(drop=True)
-    grouped['cumulative_net_cashflow'] = grouped['net_cashflow'].cumsum()
+    daily['net_cashflow'] = daily['capital_calls'] + daily['distributions']
+    daily['cumulative_net_cashflow'] = np.cumsum(daily['net_cashflow'].to_numpy())
 
-    return grouped
+    return daily
 
 
-@st.cache_data(ttl=300)
+@st.cache_data(ttl=300, max_entries=32)
 def get_portfolio_periodic_cashflows_cached(_conn_id, fund_ids, base_currency, period='quarter', scenario_name='base'):
     """Aggregiert periodische Cashflows über ausgewählte Fonds in Basiswährung."""
-    multi_df = get_cashflows_multi_fund_base_currency_cached(
-        _conn_id, fund_ids, base_currency, scenario_name
-    )
-    if multi_df.empty or 'amount_base' not in multi_df.columns:
+    daily = get_portfolio_daily_cashflows_cached(_conn_id, fund_ids, base_currency, scenario_name)
+    if daily.empty:
         return pd.DataFrame()
 
-    valid_df = multi_df.dropna(subset=['amount_base']).copy()
-    if valid_df.empty:
-        return pd.DataFrame()
+    grouped = daily.groupby(_period_keys(daily['date'], period))[
+        ['capital_calls', 'distributions']
+    ].sum()
+    grouped = grouped.rename_axis('period_label').reset_index()
+    grouped['period_label'] = grouped['period_label'].astype(str)
 
-    valid_df['signed_amount'] = valid_df.apply(
-        lambda r: -r['amount_base'] if r['type'] in OUTFLOW_TYPES else r['amount_base'],
-        axis=1
-    )
+    grouped['net_cashflow'] = grouped['capital_calls'] + grouped['distributions']
 
-    if period == 'quarter':
-        valid_df['period_label'] = valid_df['date'].dt.to_period('Q').astype(str)
-    else:
-        valid_df['period_label'] = valid_df['date'].dt.year.astype(str)
+    return grouped
 
-    grouped = valid_df.groupby('period_label').agg(
-        capital_calls=('signed_amount', lambda x: x[x < 0].sum()),
-        distributions=('signed_amount', lambda x: x[x > 0].sum()),
-    ).reset_index()
 
-    grouped['net_cashflow'] = grouped['capital_calls'] + grouped['distributions']
-    grouped = grouped.sort_values('period_label').reset_index(drop=True)
+@st.cache_data(ttl=300, max_entries=32)
+def get_fx_today_map_cached(_conn_id, currencies, base_currency, rate_date):
+    """Kurs currency → base_currency je Währung zum Stichtag (eine Verbindung
+    für alle Währungen). currencies: sortiertes Tuple. Fehlender Kurs → None."""
+    with get_connection() as conn:
+        return {
+            ccy: get_exchange_rate_with_inverse(conn, ccy, base_currency, rate_date)
+            for ccy in currencies
+        }
 
-    return grouped
 
+@st.cache_data(ttl=300, max_entries=128)
+def get_fund_summary_in_base_cached(_conn_id, fund_id, base_currency, scenario_name='base'):
+    """Vorreduzierte Summary eines Fonds in Basiswährung (Baustein für
+    get_portfolio_summary_cached — pro Fonds gecacht, damit beim Ab-/Anwählen
+    eines Fonds die übrigen Teilergebnisse wiederverwendet werden).
 
-@st.cache_data(ttl=300)
-def get_portfolio_summary_cached(_conn_id, fund_ids, base_currency, scenario_name='base'):
-    """Portfolio-Metriken: total_commitment, total_called, total_distributed, etc."""
-    multi_df = get_cashflows_multi_fund_base_currency_cached(
-        _conn_id, fund_ids, base_currency, scenario_name
-    )
+    Returns dict: commitment_base, unfunded_base, called_base, distributed_base,
+                  fx_warning (str oder None)
+    """
+    info = get_fund_commitment_info_cached(_conn_id, fund_id)
+    fund_name = info.get('fund_name', f'Fund {fund_id}')
+    fund_ccy = info.get('currency') or 'EUR'
+
+    called = 0.0
+    distributed = 0.0
+    fx_warning = None
+    df = get_cashflows_in_base_currency_cached(_conn_id, fund_id, base_currency, scenario_name)
+    if not df.empty:
+        valid_df = df.dropna(subset=['amount_base'])
+        if len(valid_df) < len(df):
+            fx_warning = f"{fund_name} ({fund_ccy}→{base_currency})"
+        out_amt, in_amt = _split_by_direction(valid_df)
+        called = float(out_amt.sum())
+        distributed = float(in_amt.sum())
+
+    # Commitment zum heutigen Kurs
+    if fund_ccy == base_currency:
+        rate = 1.0
+    else:
+        rate = get_fx_today_map_cached(
+            _conn_id, (fund_ccy,), base_currency, date.today()
+        ).get(fund_ccy)
+    commit = info.get('commitment_amount') or 0
+    unfunded = info.get('unfunded_amount') or 0
 
-    # FX-Warnungen sammeln
-    fx_warnings = []
-    if not multi_df.empty and 'amount_base' in multi_df.columns:
-        missing_fx = multi_df[multi_df['amount_base'].isna()]
-        if not missing_fx.empty:
-            for _, row in missing_fx.drop_duplicates(subset=['fund_name', 'original_currency']).iterrows():
-                fx_warnings.append(f"{row['fund_name']} ({row['original_currency']}→{base_currency})")
-
-    valid_df = multi_df.dropna(subset=['amount_base']) if not multi_df.empty and 'amount_base' in multi_df.columns else pd.DataFrame()
-
-    total_called = 0.0
-    total_distributed = 0.0
-    if not valid_df.empty:
-        total_called = valid_df.loc[valid_df['type'].isin(OUTFLOW_TYPES), 'amount_base'].sum()
-        total_distributed = valid_df.loc[valid_df['type'].isin(INFLOW_TYPES), 'amount_base'].sum()
-
-    # Commitment in Basiswährung berechnen
-    total_commitment = 0.0
-    total_unfunded = 0.0
-    for fid in fund_ids:
-        info = get_fund_commitment_info_cached(_conn_id, fid)
-        commit = info.get('commitment_amount') or 0
-        unfunded = info.get('unfunded_amount') or 0
-        fund_ccy = info.get('currency') or 'EUR'
-        if fund_ccy == base_currency:
-            total_commitment += commit
-            total_unfunded += unfunded
-        else:
-            with get_connection() as conn:
-                rate = get_exchange_rate_with_inverse(conn, fund_ccy, base_currency, date.today())
-            if rate is not None:
-                total_commitment += commit * rate
-                total_unfunded += unfunded * rate
+    return {
+        'commitment_base': commit * rate if rate is not None else 0.0,
+        'unfunded_base': unfunded * rate if rate is not None else 0.0,
+        'called_base': called,
+        'distributed_base': distributed,
+        'fx_warning': fx_warning,
+    }
+
+
+@st.cache_data(ttl=300, max_entries=32)
+def get_portfolio_summary_cached(_conn_id, fund_ids, base_currency, scenario_name='base'):
+    """Portfolio-Metriken: total_commitment, total_called, total_distributed, etc.
+    Summe der pro Fonds gecachten Teilergebnisse (get_fund_summary_in_base_cached)."""
+    parts = [
+        get_fund_summary_in_base_cached(_conn_id, fid, base_currency, scenario_name)
+        for fid in fund_ids
+    ]
+
+    total_commitment = sum(p['commitment_base'] for p in parts)
+    total_unfunded = sum(p['unfunded_base'] for p in parts)
+    total_called = sum(p['called_base'] for p in parts)
+    total_distributed = sum(p['distributed_base'] for p in parts)
+    fx_warnings = tuple(p['fx_warning'] for p in parts if p['fx_warning'])
 
     net = total_distributed - total_called
     dpi = total_distributed / total_called if total_called > 0 else 0.0
 
-    return {
-        'total_commitment': total_commitment,
-        'total_called': total_called,
-        'total_distributed': total_distributed,
-        'total_unfunded': total_unfunded,
-        'net_cashflow': net,
-        'portfolio_dpi': dpi,
-        'num_funds': len(fund_ids),
-        'fx_warnings': fx_warnings,
-    }
+    return PortfolioSummary(
+        total_commitment=float(total_commitment),
+        total_called=float(total_called),
+        total_distributed=float(total_distributed),
+        total_unfunded=float(total_unfunded),
+        net_cashflow=float(net),
+        portfolio_dpi=float(dpi),
+        num_funds=len(fund_ids),
+        fx_warnings=fx_warnings,
+    )
 
 
-@st.cache_data(ttl=300)
+@st.cache_data(ttl=300, max_entries=32)
 def get_portfolio_fund_breakdown_cached(_conn_id, fund_ids, base_currency, scenario_name='base'):
     """Pro-Fonds Aufschlüsselung in Basiswährung."""
-    rows = []
-    for fid in fund_ids:
-        info = get_fund_commitment_info_cached(_conn_id, fid)
-        fund_name = info.get('fund_name', f'Fund {fid}')
-        fund_ccy = info.get('currency') or 'EUR'
-        commit = info.get('commitment_amount') or 0
-
-        # Commitment konvertieren
-        if fund_ccy == base_currency:
-            fx = 1.0
-        else:
-            with get_connection() as conn:
-                fx = get_exchange_rate_with_inverse(conn, fund_ccy, base_currency, date.today())
-            if fx is None:
-                fx = None
+    summaries = get_cashflow_summaries_batch_cached(_conn_id, fund_ids, scenario_name)
+    if summaries.empty:
+        return pd.DataFrame()
 
-        commit_base = commit * fx if fx is not None else None
+    # Eine Zeile je angefragtem Fonds, in Reihenfolge von fund_ids
+    bd = summaries.set_index('fund_id').reindex(list(fund_ids))
+    currency = bd['currency'].fillna('EUR')
+    fund_name = bd['fund_name'].fillna(pd.Series([f'Fund {fid}' for fid in fund_ids], index=bd.index))
 
-        # Cashflow-Summary
-        summary = get_cashflow_summary_cached(_conn_id, fid, scenario_name)
-        called = summary.get('total_called', 0)
-        distributed = summary.get('total_distributed', 0)
+    fx_today = get_fx_today_map_cached(
+        _conn_id, tuple(sorted(set(currency) - {base_currency})), base_currency, date.today()
+    )
 
-        called_base = called * fx if fx is not None else None
-        distributed_base = distributed * fx if fx is not None else None
-        net_base = (distributed_base - called_base) if called_base is not None and distributed_base is not None else None
-        dpi = summary.get('dpi', 0)
+    # FX je Fonds als Array: 1.0 in Basiswährung, NaN ohne Kurs
+    fx = np.where(currency.to_numpy() == base_currency, 1.0,
+                  currency.map(fx_today).to_numpy(dtype=float, na_value=np.nan))
+    commit = bd['commitment_amount'].fillna(0).to_numpy(dtype=float)
+    called = bd['total_called'].fillna(0).to_numpy(dtype=float)
+    distributed = bd['total_distributed'].fillna(0).to_numpy(dtype=float)
 
-        rows.append({
-            'fund_name': fund_name,
-            'currency': fund_ccy,
-            'commitment_base': commit_base,
-            'called_base': called_base,
-            'distributed_base': distributed_base,
-            'net_base': net_base,
-            'dpi': dpi,
-        })
+    called_base = called * fx
+    distributed_base = distributed * fx
 
-    return pd.DataFrame(rows)
+    return pd.DataFrame({
+        'fund_name': fund_name.to_numpy(),
+        'currency': currency.to_numpy(),
+        'commitment_base': commit * fx,
+        'called_base': called_base,
+        'distributed_base': distributed_base,
+        'net_base': distributed_base - called_base,
+        'dpi': np.divide(distributed, called, out=np.zeros_like(called), where=called > 0),
+    })
 
 
 # ============================================================================
 # IST VS. FORECAST
 # ============================================================================
 
-@st.cache_data(ttl=300)
-def get_actual_vs_forecast_cached(_conn_id, fund_id, scenario_name='base'):
-    """Splittet Cashflows in Ist und Forecast, berechnet Abweichungen."""
-    df = get_cashflows_for_fund_cached(_conn_id, fund_id, scenario_name)
-    if df.empty:
-        return {'actual_cumulative': pd.DataFrame(), 'forecast_cumulative': pd.DataFrame(),
-                'periodic_deviation': pd.DataFrame(),
-                'metrics': {'tracking_error': 0, 'mean_deviation': 0,
-                            'pct_calls_realized': 0, 'pct_dists_realized': 0}}
+def _actual_vs_forecast_frames(df):
+    """Kumulative Reihen und quartalsweise Abweichung für Ist und Plan.
 
-    df = df.copy()
-    df['signed_amount'] = df.apply(
-        lambda r: -r['amount'] if r['type'] in OUTFLOW_TYPES else r['amount'],
-        axis=1
-    )
+    Je ein groupby über (is_actual, date) bzw. (is_actual, period) liefert beide
+    Zweige auf einmal, statt den Frame vorab in zwei Teilframes zu splitten.
+    Erwartet die Spalten aus _add_signed_columns sowie period (Quartals-Keys).
+    Returns (actual_cumulative, forecast_cumulative, periodic_deviation).
+    """
+    daily = df.groupby(['is_actual', 'date'])[['capital_calls', 'distributions']].sum()
+    daily['net_cashflow'] = daily['capital_calls'] + daily['distributions']
+    daily['cumulative_net_cashflow'] = daily.groupby(level='is_actual')['net_cashflow'].cumsum()
 
-    actual_df = df[df['is_actual'] == True].copy()
-    forecast_df = df[df['is_actual'] == False].copy()
+    per = df.groupby(['is_actual', 'period'])[
+        ['capital_calls', 'distributions', 'signed_amount']
+    ].sum()
+    per.columns = ['calls', 'dists', 'net']
 
-    def _build_cumulative(sub_df):
-        if sub_df.empty:
-            return pd.DataFrame()
-        grouped = sub_df.groupby('date').agg(
-            capital_calls=('signed_amount', lambda x: x[x < 0].sum()),
-            distributions=('signed_amount', lambda x: x[x > 0].sum()),
-        ).reset_index()
-        grouped['net_cashflow'] = grouped['capital_calls'] + grouped['distributions']
-        grouped = grouped.sort_values('date').reset_index(drop=True)
-        grouped['cumulative_net_cashflow'] = grouped['net_cashflow'].cumsum()
-        return grouped
-
-    actual_cum = _build_cumulative(actual_df)
-    forecast_cum = _build_cumulative(forecast_df)
-
-    # Periodische Abweichung (quartalsweise)
-    def _periodic(sub_df):
-        if sub_df.empty:
+    def _branch(grouped, flag):
+        if flag not in grouped.index.get_level_values('is_actual'):
             return pd.DataFrame()
-        sub_df = sub_df.copy()
-        sub_df['period'] = sub_df['date'].dt.to_period('Q').astype(str)
-        return sub_df.groupby('period').agg(
-            calls=('signed_amount', lambda x: x[x < 0].sum()),
-            dists=('signed_amount', lambda x: x[x > 0].sum()),
-            net=('signed_amount', 'sum'),
-        ).reset_index()
+        return grouped.xs(flag, level='is_actual').reset_index()
 
-    actual_per = _periodic(actual_df)
-    forecast_per = _periodic(forecast_df)
+    actual_per = _branch(per, True)
+    forecast_per = _branch(per, False)
 
     deviation_df = pd.DataFrame()
     if not actual_per.empty and not forecast_per.empty:
         merged = actual_per.merge(forecast_per, on='period', how='outer', suffixes=('_actual', '_forecast'))
         merged = merged.fillna(0).sort_values('period').reset_index(drop=True)
+        # Labels erst auf dem Ergebnis
+        merged['period'] = merged['period'].astype(str)
         merged['deviation'] = merged['net_actual'] - merged['net_forecast']
         deviation_df = merged[['period', 'net_actual', 'net_forecast', 'deviation']]
 
+    return _branch(daily, True), _branch(daily, False), deviation_df
+
+
+def _actual_forecast_totals(df, amount_col='amount_base'):
+    """Calls/Distributions je Ist und Plan in einem groupby-Durchlauf.
+    Returns (actual_calls, actual_dists, forecast_calls, forecast_dists)."""
+    out_amt, in_amt = _split_by_direction(df, amount_col)
+    totals = pd.DataFrame({'calls': out_amt, 'dists': in_amt}).groupby(
+        df['is_actual'].to_numpy(dtype=bool)
+    ).sum().reindex([True, False], fill_value=0.0)
+    return (totals.at[True, 'calls'], totals.at[True, 'dists'],
+            totals.at[False, 'calls'], totals.at[False, 'dists'])
+
+
+@st.cache_data(ttl=300, max_entries=128)
+def get_actual_vs_forecast_cached(_conn_id, fund_id, scenario_name='base'):
+    """Splittet Cashflows in Ist und Forecast, berechnet Abweichungen."""
+    df = get_cashflows_for_fund_cached(_conn_id, fund_id, scenario_name)
+    if df.empty:
+        return {'actual_cumulative': pd.DataFrame(), 'forecast_cumulative': pd.DataFrame(),
+                'periodic_deviation': pd.DataFrame(),
+                'metrics': {'tracking_error': 0, 'mean_deviation': 0,
+                            'pct_calls_realized': 0, 'pct_dists_realized': 0}}
+
+    _add_signed_columns(df)
+    # Quartals-Keys für die periodische Abweichung
+    df['period'] = _period_keys(df['date'], 'quarter')
+
+    actual_cum, forecast_cum, deviation_df = _actual_vs_forecast_frames(df)
+
     # Metriken
-    actual_calls_total = actual_df.loc[actual_df['type'].isin(OUTFLOW_TYPES), 'amount'].sum() if not actual_df.empty else 0
-    forecast_calls_total = forecast_df.loc[forecast_df['type'].isin(OUTFLOW_TYPES), 'amount'].sum() if not forecast_df.empty else 0
-    actual_dists_total = actual_df.loc[actual_df['type'].isin(INFLOW_TYPES), 'amount'].sum() if not actual_df.empty else 0
-    forecast_dists_total = forecast_df.loc[forecast_df['type'].isin(INFLOW_TYPES), 'amount'].sum() if not forecast_df.empty else 0
+    (actual_calls_total, actual_dists_total,
+     forecast_calls_total, forecast_dists_total) = _actual_forecast_totals(df, 'amount')
 
     pct_calls = (actual_calls_total / forecast_calls_total * 100) if forecast_calls_total > 0 else 0
     pct_dists = (actual_dists_total / forecast_dists_total * 100) if forecast_dists_total > 0 else 0
@@ -537,7 +847,7 @@ def get_actual_vs_forecast_cached(_conn_id, fund_id, scenario_name='base'):
     }
 
 
-@st.cache_data(ttl=300)
+@st.cache_data(ttl=300, max_entries=32)
 def get_portfolio_actual_vs_forecast_cached(_conn_id, fund_ids, base_currency, scenario_name='base'):
     """Aggregierte Ist vs. Forecast Analyse über mehrere Fonds."""
     multi_df = get_cashflows_multi_fund_base_currency_cached(
@@ -549,61 +859,24 @@ def get_portfolio_actual_vs_forecast_cached(_conn_id, fund_ids, base_currency, s
                 'metrics': {'tracking_error': 0, 'mean_deviation': 0,
                             'pct_calls_realized': 0, 'pct_dists_realized': 0}}
 
-    valid_df = multi_df.dropna(subset=['amount_base']).copy()
+    # Schmaler Arbeitsframe mit nur den benötigten Spalten statt Voll-Kopie;
+    # explizit kopiert, da _add_signed_columns Spalten ergänzt (multi_df ist geteilt)
+    valid_df = multi_df.loc[
+        multi_df['amount_base'].notna(), ['date', 'type', 'is_actual', 'amount_base']
+    ].copy()
     if valid_df.empty:
         return {'actual_cumulative': pd.DataFrame(), 'forecast_cumulative': pd.DataFrame(),
                 'periodic_deviation': pd.DataFrame(),
                 'metrics': {'tracking_error': 0, 'mean_deviation': 0,
                             'pct_calls_realized': 0, 'pct_dists_realized': 0}}
 
-    valid_df['signed_amount'] = valid_df.apply(
-        lambda r: -r['amount_base'] if r['type'] in OUTFLOW_TYPES else r['amount_base'],
-        axis=1
-    )
+    _add_signed_columns(valid_df, 'amount_base')
+    valid_df['period'] = _period_keys(valid_df['date'], 'quarter')
 
-    actual_df = valid_df[valid_df['is_actual'] == True]
-    forecast_df = valid_df[valid_df['is_actual'] == False]
+    actual_cum, forecast_cum, deviation_df = _actual_vs_forecast_frames(valid_df)
 
-    def _build_cumulative(sub_df):
-        if sub_df.empty:
-            return pd.DataFrame()
-        grouped = sub_df.groupby('date').agg(
-            capital_calls=('signed_amount', lambda x: x[x < 0].sum()),
-            distributions=('signed_amount', lambda x: x[x > 0].sum()),
-        ).reset_index()
-        grouped['net_cashflow'] = grouped['capital_calls'] + grouped['distributions']
-        grouped = grouped.sort_values('date').reset_index(drop=True)
-        grouped['cumulative_net_cashflow'] = grouped['net_cashflow'].cumsum()
-        return grouped
-
-    actual_cum = _build_cumulative(actual_df)
-    forecast_cum = _build_cumulative(forecast_df)
-
-    def _periodic(sub_df):
-        if sub_df.empty:
-            return pd.DataFrame()
-        sub_df = sub_df.copy()
-        sub_df['period'] = sub_df['date'].dt.to_period('Q').astype(str)
-        return sub_df.groupby('period').agg(
-            calls=('signed_amount', lambda x: x[x < 0].sum()),
-            dists=('signed_amount', lambda x: x[x > 0].sum()),
-            net=('signed_amount', 'sum'),
-        ).reset_index()
-
-    actual_per = _periodic(actual_df)
-    forecast_per = _periodic(forecast_df)
-
-    deviation_df = pd.DataFrame()
-    if not actual_per.empty and not forecast_per.empty:
-        merged = actual_per.merge(forecast_per, on='period', how='outer', suffixes=('_actual', '_forecast'))
-        merged = merged.fillna(0).sort_values('period').reset_index(drop=True)
-        merged['deviation'] = merged['net_actual'] - merged['net_forecast']
-        deviation_df = merged[['period', 'net_actual', 'net_forecast', 'deviation']]
-
-    actual_calls_total = actual_df.loc[actual_df['type'].isin(OUTFLOW_TYPES), 'amount_base'].sum() if not actual_df.empty else 0
-    forecast_calls_total = forecast_df.loc[forecast_df['type'].isin(OUTFLOW_TYPES), 'amount_base'].sum() if not forecast_df.empty else 0
-    actual_dists_total = actual_df.loc[actual_df['type'].isin(INFLOW_TYPES), 'amount_base'].sum() if not actual_df.empty else 0
-    forecast_dists_total = forecast_df.loc[forecast_df['type'].isin(INFLOW_TYPES), 'amount_base'].sum() if not forecast_df.empty else 0
+    (actual_calls_total, actual_dists_total,
+     forecast_calls_total, forecast_dists_total) = _actual_forecast_totals(valid_df)
 
     pct_calls = (actual_calls_total / forecast_calls_total * 100) if forecast_calls_total > 0 else 0
     pct_dists = (actual_dists_total / forecast_dists_total * 100) if forecast_dists_total > 0 else 0
@@ -631,55 +904,44 @@ def get_portfolio_actual_vs_forecast_cached(_conn_id, fund_ids, base_currency, s
 # ALERTS / DEADLINES
 # ============================================================================
 
-@st.cache_data(ttl=300)
+@st.cache_data(ttl=300, max_entries=32)
 def get_funding_gap_cached(_conn_id, fund_ids, base_currency, period='quarter', scenario_name='base'):
     """Funding-Gap Analyse: pro Periode erwartete Calls vs. Distributions.
 
     Nutzt nur is_actual=False (geplante Cashflows).
     Returns DataFrame: period_label, expected_calls, expected_distributions,
                        net_funding_need, cumulative_funding_need
+    fund_ids: sortiertes Tuple (kanonischer Cache-Key).
     """
-    multi_df = get_cashflows_multi_fund_base_currency_cached(
-        _conn_id, fund_ids, base_currency, scenario_name
+    # Geplante Cashflows, in der DB pro (Datum, Währung) vorsummiert und in
+    # Basiswährung konvertiert → hier nur noch die kleine Tagestabelle je Periode
+    daily = get_portfolio_daily_cashflows_cached(
+        _conn_id, fund_ids, base_currency, scenario_name, planned_only=True
     )
-    if multi_df.empty or 'amount_base' not in multi_df.columns:
+    if daily.empty:
         return pd.DataFrame()
 
-    # Nur geplante Cashflows
-    planned = multi_df[multi_df['is_actual'] == False].copy()
-    if planned.empty:
-        return pd.DataFrame()
-
-    valid = planned.dropna(subset=['amount_base']).copy()
-    if valid.empty:
-        return pd.DataFrame()
-
-    if period == 'quarter':
-        valid['period_label'] = valid['date'].dt.to_period('Q').astype(str)
-    else:
-        valid['period_label'] = valid['date'].dt.year.astype(str)
-
-    grouped = valid.groupby('period_label').apply(
-        lambda g: pd.Series({
-            'expected_calls': g.loc[g['type'].isin(OUTFLOW_TYPES), 'amount_base'].sum(),
-            'expected_distributions': g.loc[g['type'].isin(INFLOW_TYPES), 'amount_base'].sum(),
-        })
-    ).reset_index()
+    grouped = pd.DataFrame({
+        'expected_calls': 0.0 - daily['capital_calls'].to_numpy(),
+        'expected_distributions': daily['distributions'].to_numpy(),
+    }, index=daily.index).groupby(_period_keys(daily['date'], period).rename('period_label')).sum()
+    grouped.index = grouped.index.astype(str)
+    grouped = grouped.reset_index()
 
     grouped['net_funding_need'] = grouped['expected_distributions'] - grouped['expected_calls']
-    grouped = grouped.sort_values('period_label').reset_index(drop=True)
-    grouped['cumulative_funding_need'] = grouped['net_funding_need'].cumsum()
+    grouped['cumulative_funding_need'] = np.cumsum(grouped['net_funding_need'].to_numpy())
 
     return grouped
 
 
-@st.cache_data(ttl=300)
+@st.cache_data(ttl=300, max_entries=32)
 def get_cash_reserve_simulation_cached(_conn_id, fund_ids, base_currency, start_balance,
                                         scenario_name='base', include_actuals=True):
     """Cash-Reserve Simulation: simuliert Kontoverlauf über Zeit.
 
     Startet mit start_balance, addiert Inflows, subtrahiert Outflows.
-    Returns DataFrame: date, inflow, outflow, net, balance
+    Returns DataFrame: date (datetime64), inflow, outflow, net, balance
+    fund_ids: sortiertes Tuple (kanonischer Cache-Key).
     """
     multi_df = get_cashflows_multi_fund_base_currency_cached(
         _conn_id, fund_ids, base_currency, scenario_name
@@ -687,33 +949,40 @@ def get_cash_reserve_simulation_cached(_conn_id, fund_ids, base_currency, start_
     if multi_df.empty or 'amount_base' not in multi_df.columns:
         return pd.DataFrame()
 
-    valid = multi_df.dropna(subset=['amount_base']).copy()
+    valid = multi_df.dropna(subset=['amount_base'])
     if not include_actuals:
         valid = valid[valid['is_actual'] == False]
     if valid.empty:
         return pd.DataFrame()
 
-    # Pro Datum aggregieren
-    daily = valid.groupby('date').apply(
-        lambda g: pd.Series({
-            'inflow': g.loc[g['type'].isin(INFLOW_TYPES), 'amount_base'].sum(),
-            'outflow': g.loc[g['type'].isin(OUTFLOW_TYPES), 'amount_base'].sum(),
-        })
-    ).reset_index()
-
-    daily = daily.sort_values('date').reset_index(drop=True)
+    # Pro Datum aggregieren (maskierte Spalten, groupby sortiert nach Datum)
+    out_amt, in_amt = _split_by_direction(valid)
+    daily = pd.DataFrame({
+        'date': valid['date'],
+        'inflow': in_amt,
+        'outflow': out_amt,
+    }).groupby('date').sum().reset_index()
     daily['net'] = daily['inflow'] - daily['outflow']
 
     # Kumulativer Kontostand
-    daily['balance'] = start_balance + daily['net'].cumsum()
+    daily['balance'] = start_balance + np.cumsum(daily['net'].to_numpy())
 
     return daily
 
 
-@st.cache_data(ttl=300)
-def get_upcoming_capital_calls_cached(_conn_id, days_ahead=90):
-    """Anstehende Capital Calls (is_actual=False, type=capital_call, in Zukunft)."""
-    today = date.today()
+def _fetch_df(conn, query, params):
+    """Query → DataFrame direkt über den Cursor (Spalten aus cursor.description,
+    ohne den Umweg über read_sql_query). Decimal wird wie dort zu float."""
+    with conn.cursor() as cursor:
+        cursor.execute(query, params)
+        columns = [desc[0] for desc in cursor.description]
+        return pd.DataFrame.from_records(cursor.fetchall(), columns=columns, coerce_float=True)
+
+
+@st.cache_data(ttl=300, max_entries=8)
+def get_upcoming_capital_calls_cached(_conn_id, today, days_ahead=90):
+    """Anstehende Capital Calls (is_actual=False, type=capital_call, in Zukunft).
+    today ist Teil des Cache-Keys → nach Mitternacht kein Ergebnis vom Vortag."""
     end_date = today + timedelta(days=days_ahead)
     with get_connection() as conn:
         query = """
@@ -725,17 +994,16 @@ def get_upcoming_capital_calls_cached(_conn_id, days_ahead=90):
           AND c.date >= %s AND c.date <= %s
         ORDER BY c.date ASC
         """
-        df = pd.read_sql_query(query, conn, params=(today, end_date))
+        df = _fetch_df(conn, query, (today, end_date))
     if not df.empty:
         df['date'] = pd.to_datetime(df['date'])
         df['days_until'] = (df['date'] - pd.Timestamp(today)).dt.days
     return df
 
 
-@st.cache_data(ttl=300)
-def get_commitment_deadline_warnings_cached(_conn_id, days_ahead=90):
-    """Fonds deren expected_end_date innerhalb von days_ahead liegt."""
-    today = date.today()
+@st.cache_data(ttl=300, max_entries=8)
+def get_commitment_deadline_warnings_cached(_conn_id, today, days_ahead=90):
+    """Fonds deren expected_end_date innerhalb von days_ahead liegt (ab today)."""
     end_date = today + timedelta(days=days_ahead)
     with get_connection() as conn:
         query = """
@@ -745,7 +1013,7 @@ def get_commitment_deadline_warnings_cached(_conn_id, days_ahead=90):
           AND expected_end_date >= %s AND expected_end_date <= %s
         ORDER BY expected_end_date ASC
         """
-        df = pd.read_sql_query(query, conn, params=(today, end_date))
+        df = _fetch_df(conn, query, (today, end_date))
     if not df.empty:
         df['expected_end_date'] = pd.to_datetime(df['expected_end_date'])
         df['days_until'] = (df['expected_end_date'] - pd.Timestamp(today)).dt.days
@@ -11,7 +11,7 @@ import matplotlib.dates as mdates
 import numpy as np
 
 from cashflow_queries import (
-    get_cumulative_cashflows_cached, get_cashflow_summary_cached,
+    get_scenario_comparison_data_cached,
     get_scenarios_cached, OUTFLOW_TYPES, INFLOW_TYPES
 )
 
@@ -49,15 +49,10 @@ def render_scenario_comparison(conn_id, fund_id, fund_name, currency, commit_inf
             st.info("Bitte mindestens 2 Szenarien auswählen.")
             return
 
-        # Daten laden
-        scenario_data = {}
-        for sc_name in selected_scenarios:
-            cum_df = get_cumulative_cashflows_cached(conn_id, fund_id, sc_name)
-            summary = get_cashflow_summary_cached(conn_id, fund_id, sc_name)
-            scenario_data[sc_name] = {
-                'cumulative': cum_df,
-                'summary': summary,
-            }
+        # Daten laden: alle Szenarien aus einem SQL-Aggregat (Reihenfolge wie Auswahl)
+        scenario_data = get_scenario_comparison_data_cached(
+            conn_id, fund_id, tuple(selected_scenarios)
+        )
 
         # Metriken berechnen
         _render_metrics_table(scenario_data, currency)
@@ -85,29 +80,28 @@ def render_scenario_comparison(conn_id, fund_id, fund_name, currency, commit_inf
 def _compute_scenario_metrics(cum_df, summary):
     """Berechnet erweiterte Metriken für ein Szenario."""
 
-    total_called = summary.get('total_called', 0)
-    total_dist = summary.get('total_distributed', 0)
-    net = summary.get('net_cashflow', 0)
-    dpi = summary.get('dpi', 0)
+    total_called = summary.total_called
+    total_dist = summary.total_distributed
+    net = summary.net_cashflow
+    dpi = summary.dpi
 
     breakeven_quarter = None
     peak_negative = 0.0
 
     if not cum_df.empty and 'cumulative_net_cashflow' in cum_df.columns:
-        cum_net = cum_df['cumulative_net_cashflow']
+        cum_net = cum_df['cumulative_net_cashflow'].to_numpy(dtype=float)
 
         # Peak Negative
         peak_negative = cum_net.min()
 
-        # Breakeven: erster Nulldurchgang (von negativ zu positiv)
-        for i in range(1, len(cum_net)):
-            if cum_net.iloc[i - 1] < 0 and cum_net.iloc[i] >= 0:
-                d = cum_df['date'].iloc[i]
-                if hasattr(d, 'strftime'):
-                    breakeven_quarter = d.strftime('%Y-Q') + str((d.month - 1) // 3 + 1)
-                else:
-                    breakeven_quarter = str(d)
-                break
+        # Breakeven: erster Nulldurchgang (von negativ zu positiv), als Maske statt iloc-Schleife
+        crossings = np.flatnonzero((cum_net[:-1] < 0) & (cum_net[1:] >= 0))
+        if len(crossings):
+            d = cum_df['date'].iloc[crossings[0] + 1]
+            if hasattr(d, 'strftime'):
+                breakeven_quarter = d.strftime('%Y-Q') + str((d.month - 1) // 3 + 1)
+            else:
+                breakeven_quarter = str(d)
 
     return {
         'Total Calls': total_called,
@@ -148,27 +142,30 @@ def _render_metrics_table(scenario_data, currency):
     st.dataframe(df, hide_index=True, width='stretch')
 
 
+def _has_cumulative_data(scenario_data):
+    """True, wenn mindestens ein Szenario kumulative Daten hat."""
+    return any(not data['cumulative'].empty for data in scenario_data.values())
+
+
 def _create_jcurve_overlay(scenario_data, fund_name, currency):
     """Erstellt J-Curve Overlay mit einer Linie pro Szenario."""
 
+    # Erst prüfen, dann Figure anlegen (kein plt.subplots für den leeren Fall)
+    if not _has_cumulative_data(scenario_data):
+        return None
+
     fig, ax = plt.subplots(figsize=(12, 6))
-    has_data = False
 
     for idx, (sc_name, data) in enumerate(scenario_data.items()):
         cum_df = data['cumulative']
         if cum_df.empty:
             continue
-        has_data = True
         color = SCENARIO_COLORS[idx % len(SCENARIO_COLORS)]
         ax.plot(
             cum_df['date'], cum_df['cumulative_net_cashflow'],
             color=color, linewidth=2, label=sc_name, zorder=3
         )
 
-    if not has_data:
-        plt.close(fig)
-        return None
-
     ax.axhline(y=0, color='gray', linestyle='--', linewidth=0.8)
     ax.set_title(f'J-Curve Overlay: {fund_name}', fontsize=14, fontweight='bold')
     ax.set_xlabel('Datum')
@@ -186,19 +183,21 @@ def _create_jcurve_overlay(scenario_data, fund_name, currency):
 def _create_cumulative_comparison(scenario_data, fund_name, currency):
     """Erstellt kumulativen Vergleich: Calls (gestrichelt) + Dists (durchgezogen)."""
 
+    # Erst prüfen, dann Figure anlegen (kein plt.subplots für den leeren Fall)
+    if not _has_cumulative_data(scenario_data):
+        return None
+
     fig, ax = plt.subplots(figsize=(12, 6))
-    has_data = False
 
     for idx, (sc_name, data) in enumerate(scenario_data.items()):
         cum_df = data['cumulative']
         if cum_df.empty:
             continue
-        has_data = True
         color = SCENARIO_COLORS[idx % len(SCENARIO_COLORS)]
 
-        # Kumulative Werte
-        cum_calls = cum_df['capital_calls'].cumsum().abs()
-        cum_dists = cum_df['distributions'].cumsum()
+        # Kumulative Werte (vorberechnet in get_scenario_comparison_data_cached)
+        cum_calls = -cum_df['cum_calls']
+        cum_dists = cum_df['cum_dists']
 
         ax.plot(
             cum_df['date'], cum_calls,
@@ -211,10 +210,6 @@ def _create_cumulative_comparison(scenario_data, fund_name, currency):
             label=f'{sc_name} (Dists)'
         )
 
-    if not has_data:
-        plt.close(fig)
-        return None
-
     ax.set_title(f'Kumulativer Vergleich: {fund_name}', fontsize=14, fontweight='bold')
     ax.set_xlabel('Datum')
     ax.set_ylabel(f'Kumulierter Betrag ({currency})')
@@ -49,6 +49,9 @@ TYPE_LABELS = {
     'clawback': 'Clawback',
 }
 LABEL_TO_TYPE = {v: k for k, v in TYPE_LABELS.items()}
+TYPE_DIRECTION_LABELS = {
+    t: '↗ Outflow' if t in OUTFLOW_TYPES else '↙ Inflow' for t in TYPE_LABELS
+}
 
 
 def render_cashflow_tab(conn, conn_id, selected_fund_ids, selected_fund_names):
@@ -248,31 +251,25 @@ def render_fund_detail_section(conn, conn_id, selected_fund_ids, selected_fund_n
         summary = get_cashflow_summary_cached(conn_id, fund_id, selected_scenario)
         sm1, sm2, sm3, sm4 = st.columns(4)
         with sm1:
-            st.metric("Total Abrufe", f"{summary['total_called']:,.0f} {currency}")
+            st.metric("Total Abrufe", f"{summary.total_called:,.0f} {currency}")
         with sm2:
             st.metric("Total Ausschüttungen",
-                       f"{summary['total_distributed']:,.0f} {currency}")
+                       f"{summary.total_distributed:,.0f} {currency}")
         with sm3:
-            st.metric("Netto-Cashflow", f"{summary['net_cashflow']:,.0f} {currency}")
+            st.metric("Netto-Cashflow", f"{summary.net_cashflow:,.0f} {currency}")
         with sm4:
-            st.metric("DPI", f"{summary['dpi']:.2f}x")
-
-        # Tabelle
-        display_df = cf_df[['cashflow_id', 'date', 'type', 'amount', 'is_actual', 'notes']].copy()
-        display_df['date'] = display_df['date'].dt.strftime('%Y-%m-%d')
-        display_df['type_label'] = display_df['type'].map(TYPE_LABELS)
-        display_df['Richtung'] = display_df['type'].apply(
-            lambda t: '↗ Outflow' if t in OUTFLOW_TYPES else '↙ Inflow'
-        )
-        display_df['amount_fmt'] = display_df['amount'].apply(lambda x: f"{x:,.0f}")
-        display_df['Status'] = display_df['is_actual'].apply(
-            lambda x: 'Ist' if x else 'Plan'
-        )
-
-        # Anzeige-Tabelle
-        show_df = display_df[['date', 'type_label', 'Richtung', 'amount_fmt', 'Status', 'notes']].copy()
-        show_df.columns = ['Datum', 'Typ', 'Richtung', f'Betrag ({currency})', 'Status', 'Notizen']
-        show_df['Notizen'] = show_df['Notizen'].fillna('')
+            st.metric("DPI", f"{summary.dpi:.2f}x")
+
+        # Tabelle: Anzeige-Frame direkt aus cf_df aufbauen (keine Zuweisung auf eine Spaltenauswahl)
+        show_df = pd.DataFrame({
+            'Datum': cf_df['date'].dt.strftime('%Y-%m-%d'),
+            'Typ': cf_df['type'].map(TYPE_LABELS),
+            # type ist Categorical → map läuft einmal pro Kategorie statt pro Zeile
+            'Richtung': cf_df['type'].map(TYPE_DIRECTION_LABELS),
+            f'Betrag ({currency})': cf_df['amount'].apply(lambda x: f"{x:,.0f}"),
+            'Status': cf_df['is_actual'].apply(lambda x: 'Ist' if x else 'Plan'),
+            'Notizen': cf_df['notes'].fillna(''),
+        })
 
         st.dataframe(show_df, width='stretch', hide_index=True)
 
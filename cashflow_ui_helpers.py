@@ -0,0 +1,37 @@
+"""
+Cashflow Planning Tool — Gemeinsame UI-Helfer
+
+Von mehreren Cashflow-UI-Modulen genutzte Streamlit-Bausteine.
+"""
+
+import pandas as pd
+import streamlit as st
+
+from cashflow_charts import df_hash, fig_to_png_bytes
+
+
+def amount_column_config(columns):
+    """column_config für Betragsspalten: numerisch, mit Tausendertrennung."""
+    amount_col = st.column_config.NumberColumn(format="localized")
+    return {col: amount_col for col in columns}
+
+
+# Charts werden einmal zu PNG gerendert; Reruns zeigen nur die gecachten bytes.
+# Builder und DataFrames werden nicht gehasht (_builder, _args); der Key ist der
+# Builder-Name plus Inhalts-Hash der DataFrames bzw. die übrigen Parameter.
+
+@st.cache_data(ttl=300, max_entries=48)
+def _chart_png_cached(_builder, builder_name, _args, args_key):
+    fig = _builder(*_args)
+    return fig_to_png_bytes(fig) if fig else None
+
+
+def chart_png(builder, *args):
+    """Rendert builder(*args) (matplotlib Figure oder None) gecacht als PNG-bytes.
+
+    DataFrame-Argumente gehen über df_hash in den Cache-Key ein, alle anderen
+    Argumente direkt. Gibt None zurück, wenn der Builder keine Figure liefert.
+    """
+    args_key = tuple(df_hash(a) if isinstance(a, pd.DataFrame) else a for a in args)
+    builder_name = f"{builder.__module__}.{builder.__qualname__}"
+    return _chart_png_cached(builder, builder_name, args, args_key)
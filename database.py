@@ -18,20 +18,39 @@ DATABASE_CONFIG = {
     'password': st.secrets["postgres"]["password"],
 }
 
-CONNECTION_POOL = pool.SimpleConnectionPool(
-    minconn=1,
-    maxconn=10,
-    **DATABASE_CONFIG
-)
+@st.cache_resource(on_release=lambda connection_pool: connection_pool.closeall())
+def _get_connection_pool():
+    """Ein Connection Pool pro Prozess, geteilt über alle Sessions.
+
+    ThreadedConnectionPool, da Streamlit jede Session in einem eigenen
+    Thread ausführt (SimpleConnectionPool ist nicht thread-safe).
+    Wird der Cache-Eintrag verworfen, schließt on_release alle Verbindungen.
+    """
+    return pool.ThreadedConnectionPool(
+        minconn=1,
+        maxconn=10,
+        **DATABASE_CONFIG
+    )
+
 
 @contextmanager
 def get_connection():
     """Holt eine Verbindung aus dem Connection Pool als Context Manager"""
-    conn = CONNECTION_POOL.getconn()
+    connection_pool = _get_connection_pool()
+    conn = connection_pool.getconn()
+    rollback_failed = False
     try:
         yield conn
+    except Exception:
+        # Abgebrochene Transaktion nicht an den nächsten Nutzer weitergeben
+        try:
+            conn.rollback()
+        except Exception:
+            rollback_failed = True
+        raise
     finally:
-        CONNECTION_POOL.putconn(conn)
+        # Kaputte Verbindungen schließen statt in den Pool zurückzulegen
+        connection_pool.putconn(conn, close=conn.closed or rollback_failed)
 
 
 # ============================================================================
@@ -475,5 +494,16 @@ def get_quarter_end_date(input_date):
 
 
 def clear_cache():
-    """Löscht den gesamten Streamlit-Cache"""
+    """Löscht den Streamlit-Daten-Cache und die datenhaltenden Resource-Caches.
+
+    Kein st.cache_resource.clear(): das würde den Connection Pool verwerfen.
+    """
+    from cashflow_pipeline_queries import get_pipeline_kanban_data_cached
+    from cashflow_queries import (
+        get_cashflows_multi_fund_base_currency_cached,
+        get_portfolio_cumulative_cashflows_cached,
+    )
     st.cache_data.clear()
+    get_pipeline_kanban_data_cached.clear()
+    get_cashflows_multi_fund_base_currency_cached.clear()
+    get_portfolio_cumulative_cashflows_cached.clear()